@@ -1,5 +1,6 @@
 from flask import (
     Flask,
+    Response,
     request,
     jsonify,
     send_from_directory,
@@ -8,6 +9,7 @@ from flask import (
 from flask_cors import CORS
 from flask_sock import Sock
 
+import io
 import os
 import threading
 import json
@@ -20,17 +22,43 @@ import time
 # ---------------------------------------------------------------------------
 
 # Import from search folder
-from search.maze_solver import Maze
-from search.maze_stack import solve_stack
-from search.maze_queue import solve_queue
-
-from ttt.ttt_logic import (
-    initial_state,
-    player,
-    actions,
-    result,
-    winner,
-    terminal,
+from search.maze_cache import (
+    cache as maze_cache,
+    maze_image as maze_image_png,
+)
+from search.maze_executor import (
+    SOLVERS,
+    SolveCancelled,
+    SolveTimeout,
+    SolverBusy,
+    SolverUnavailable,
+    client_disconnected,
+    solver_pool,
+)
+from search.maze_batch import (
+    MAX_BATCH_JOBS,
+    parse_jobs,
+    run_batch,
+)
+from search.maze_field import query_paths
+from search.maze_loader import preferred_path
+from search.maze_solver import TEXT_FORMATS
+from search.maze_stream import (
+    MAX_STREAM_BATCH_SIZE,
+    STREAM_BATCH_SIZE,
+    stream_job,
+)
+
+from ttt import mnk
+from ttt.engines import (
+    ENGINES,
+    ai_move,
+)
+from ttt.mcts import MAX_PLAYOUTS
+from ttt.parallel import SearchUnavailable
+from ttt.sessions import (
+    GameSession,
+    sessions as ttt_sessions,
 )
 
 
@@ -79,30 +107,20 @@ def maze_image(maze):
         }), 400
 
     try:
-        maze_path = os.path.join(
-            "search",
-            "mazes",
-            maze,
-        )
-
-        m = Maze(maze_path)
-
-        image_filename = (
-            f"{maze.replace('.txt', '')}_original.png"
-        )
-
-        output_path = os.path.join(
-            "static",
-            image_filename,
+        maze_path = preferred_path(
+            os.path.join(
+                "search",
+                "mazes",
+                maze,
+            )
         )
 
-        m.output_image(
-            output_path,
-            show_solution=False,
+        png = maze_image_png(
+            maze_path
         )
 
         return send_file(
-            output_path,
+            io.BytesIO(png),
             mimetype="image/png",
         )
 
@@ -119,10 +137,19 @@ def solve():
     maze_file = data.get("maze")
     algo = data.get("algorithm")
 
-    full_path = os.path.join(
-        "search",
-        "mazes",
-        maze_file,
+    # "full" keeps the original payload, "rle" run-length encodes the
+    # text and "none" leaves it out for large mazes.
+    text_format = data.get(
+        "text_format",
+        "full",
+    )
+
+    full_path = preferred_path(
+        os.path.join(
+            "search",
+            "mazes",
+            maze_file,
+        )
     )
 
     if not os.path.exists(full_path):
@@ -130,32 +157,339 @@ def solve():
             "error": "Maze file not found."
         }), 404
 
+    if algo not in SOLVERS:
+        return jsonify({
+            "error": "Unknown algorithm."
+        }), 400
+
+    if text_format not in TEXT_FORMATS:
+        return jsonify({
+            "error": "Unknown text format."
+        }), 400
+
+    environ = request.environ
+
     try:
-        if algo == "stack":
-            result_data = solve_stack(
-                full_path
-            )
+        result_data = solver_pool.solve(
+            algo,
+            full_path,
+            disconnected=lambda: client_disconnected(
+                environ
+            ),
+            text_format=text_format,
+        )
 
-        elif algo == "queue":
-            result_data = solve_queue(
-                full_path
-            )
+        return jsonify(
+            result_data
+        )
 
-        else:
+    except SolverBusy as e:
+        return jsonify({
+            "error": str(e)
+        }), 429, {
+            "Retry-After": "1",
+        }
+
+    except SolverUnavailable as e:
+        return jsonify({
+            "error": str(e)
+        }), 503
+
+    except SolveTimeout as e:
+        return jsonify({
+            "error": str(e)
+        }), 504
+
+    except SolveCancelled as e:
+        # The client is gone; nobody will read this response.
+        return jsonify({
+            "error": str(e)
+        }), 499
+
+    except Exception as e:
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+
+@app.route("/solve/batch", methods=["POST"])
+def solve_batch():
+    """
+    Solves many (maze, algorithm, options) jobs in one request.
+
+    Body:
+
+        {"jobs": [{"maze": "maze1.txt", "algorithm": "astar",
+                   "options": {"text_format": "none", "image": false}},
+                  ["maze2.txt", "queue"],
+                  ...]}
+
+    Jobs run in parallel on the solver pool, and each worker parses a
+    maze at most once. The response is NDJSON with one line per job, written as the
+    jobs finish, each carrying the job's index, states_explored and
+    timings in milliseconds, or an error.
+    """
+
+    data = request.get_json(
+        silent=True
+    ) or {}
+
+    jobs = data.get("jobs")
+
+    if not isinstance(jobs, list) or not jobs:
+        return jsonify({
+            "error": "Missing jobs."
+        }), 400
+
+    if len(jobs) > MAX_BATCH_JOBS:
+        return jsonify({
+            "error": f"At most {MAX_BATCH_JOBS} jobs per batch."
+        }), 400
+
+    valid, invalid = parse_jobs(
+        jobs,
+        os.path.join(
+            "search",
+            "mazes",
+        ),
+    )
+
+    environ = request.environ
+
+    def generate():
+        for record in invalid:
+            yield json.dumps(record) + "\n"
+
+        for record in run_batch(
+            solver_pool,
+            valid,
+            disconnected=lambda: client_disconnected(
+                environ
+            ),
+        ):
+            yield json.dumps(record) + "\n"
+
+    return Response(
+        generate(),
+        mimetype="application/x-ndjson",
+    )
+
+
+@app.route("/maze-path", methods=["POST"])
+def maze_path():
+    """
+    Answers path queries from arbitrary start cells to the maze goal
+    using the maze's precomputed distance field.
+
+    Body:
+
+        {"maze": "maze2.txt", "start": [row, col]}
+
+    or, for several queries at once:
+
+        {"maze": "maze2.txt", "starts": [[row, col], ...]}
+
+    The field is loaded, or built, on the solver pool under its job
+    limits.
+    """
+
+    data = request.get_json(
+        silent=True
+    ) or {}
+
+    maze_file = data.get("maze")
+
+    if "starts" in data:
+        starts = data.get("starts")
+    elif "start" in data:
+        starts = [data.get("start")]
+    else:
+        return jsonify({
+            "error": "Missing start."
+        }), 400
+
+    if not maze_file or not maze_file.endswith(".txt"):
+        return jsonify({
+            "error": "Invalid maze file"
+        }), 400
+
+    full_path = preferred_path(
+        os.path.join(
+            "search",
+            "mazes",
+            maze_file,
+        )
+    )
+
+    if not os.path.exists(full_path):
+        return jsonify({
+            "error": "Maze file not found."
+        }), 404
+
+    environ = request.environ
+
+    try:
+        paths = solver_pool.run(
+            query_paths,
+            full_path,
+            starts,
+            disconnected=lambda: client_disconnected(
+                environ
+            ),
+        )
+
+        if "starts" in data:
             return jsonify({
-                "error": "Unknown algorithm."
-            }), 400
+                "paths": paths
+            })
+
+        if "error" in paths[0]:
+            return jsonify(
+                paths[0]
+            ), 400
 
         return jsonify(
-            result_data
+            paths[0]
         )
 
+    except SolverBusy as e:
+        return jsonify({
+            "error": str(e)
+        }), 429, {
+            "Retry-After": "1",
+        }
+
+    except SolverUnavailable as e:
+        return jsonify({
+            "error": str(e)
+        }), 503
+
+    except SolveTimeout as e:
+        return jsonify({
+            "error": str(e)
+        }), 504
+
+    except SolveCancelled as e:
+        # The client is gone; nobody will read this response.
+        return jsonify({
+            "error": str(e)
+        }), 499
+
     except Exception as e:
         return jsonify({
             "error": str(e)
         }), 500
 
 
+@sock.route("/ws/solve")
+def solve_socket(ws):
+    """
+    Streams a maze search as it runs.
+
+    The client sends one JSON message:
+
+        {"maze": "maze1.txt", "algorithm": "queue",
+         "batch": 512, "binary": false}
+
+    and receives the frames produced by search.maze_stream.stream_frames.
+    The search runs on the solver pool under its job limits; if it
+    cannot start or is stopped by them, the last frame is an error.
+    The socket is closed after the final frame.
+    """
+
+    try:
+        data = json.loads(
+            ws.receive()
+        )
+
+        maze_file = data.get("maze")
+        algo = data.get("algorithm")
+
+        batch_size = min(
+            max(int(data.get("batch", STREAM_BATCH_SIZE)), 1),
+            MAX_STREAM_BATCH_SIZE,
+        )
+
+        binary = bool(
+            data.get("binary", False)
+        )
+
+        if algo not in SOLVERS:
+            raise ValueError("Unknown algorithm.")
+
+        full_path = preferred_path(
+            os.path.join(
+                "search",
+                "mazes",
+                maze_file,
+            )
+        )
+
+        if not os.path.exists(full_path):
+            raise ValueError("Maze file not found.")
+
+    except Exception as e:
+        ws.send(
+            json.dumps({
+                "type": "error",
+                "error": str(e),
+            })
+        )
+
+        ws.close()
+        return
+
+    frames = solver_pool.stream(
+        stream_job,
+        full_path,
+        algo,
+        batch_size=batch_size,
+        binary=binary,
+    )
+
+    try:
+        for frame in frames:
+            ws.send(frame)
+
+    except (
+        SolverBusy,
+        SolverUnavailable,
+        SolveTimeout,
+        SolveCancelled,
+    ) as e:
+        ws.send(
+            json.dumps({
+                "type": "error",
+                "error": str(e),
+            })
+        )
+
+    except Exception as e:
+        # Sending fails once the client has gone.
+        print(
+            f"[Maze] Solve stream ended early: {e}"
+        )
+
+    finally:
+        # Cancels the search if it is still running.
+        frames.close()
+
+    ws.close()
+
+
+@app.route("/maze-cache/stats", methods=["GET"])
+def maze_cache_stats():
+    """
+    Maze cache counters. "web" is this web process's own cache, used
+    for maze images. "workers" adds up the caches of the solver pool
+    workers, which serve /solve, /solve/batch and /ws/solve.
+    """
+    return jsonify({
+        "web": maze_cache.stats(),
+        "workers": solver_pool.cache_stats(),
+    })
+
+
 @app.route("/static/<filename>")
 def static_file(filename):
     return send_from_directory(
@@ -168,65 +502,353 @@ def static_file(filename):
 # Existing Tic-Tac-Toe API
 # ---------------------------------------------------------------------------
 
+def ttt_shape(values, board=None):
+    """
+    Reads rows, cols and k from request values. rows and cols default
+    to the board's shape (3x3 without a board) and k to
+    mnk.default_k. Raises ValueError for a bad or inconsistent shape.
+    """
+    if board is not None:
+        default_rows, default_cols = mnk.shape(board)
+    else:
+        default_rows, default_cols = 3, 3
+
+    rows = int(values.get("rows", default_rows))
+    cols = int(values.get("cols", default_cols))
+    k = int(values.get("k", mnk.default_k(rows, cols)))
+
+    if board is not None and (rows, cols) != (default_rows, default_cols):
+        raise ValueError(
+            f"Board is {default_rows}x{default_cols}, not {rows}x{cols}."
+        )
+
+    # Validates the shape and warms the game tables.
+    mnk.get_game(rows, cols, k)
+
+    return rows, cols, k
+
+
 @app.route("/ttt/start", methods=["GET"])
 def ttt_start():
+    try:
+        rows, cols, k = ttt_shape(
+            request.args
+        )
+
+    except ValueError as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
+
+    return jsonify({
+        "board": mnk.initial_state(rows, cols),
+        "rows": rows,
+        "cols": cols,
+        "k": k,
+    })
+
+
+def ttt_engine_options(data):
+    """
+    Reads the engine name, time budget (seconds) and MCTS playout
+    budget from request values. Raises ValueError for bad values.
+    """
+    engine = data.get(
+        "engine",
+        "alphabeta",
+    )
+
+    if engine not in ENGINES:
+        raise ValueError(
+            f"Unknown engine {engine!r}."
+        )
+
+    time_budget = float(
+        data.get(
+            "time_budget_ms",
+            mnk.DEFAULT_TIME_BUDGET * 1000,
+        )
+    ) / 1000
+
+    if not time_budget >= 0:
+        raise ValueError(
+            "time_budget_ms must be a non-negative number."
+        )
+
+    # Budgets are capped so that one request cannot hold a worker
+    # for as long as it likes.
+    time_budget = min(
+        time_budget,
+        mnk.MAX_TIME_BUDGET,
+    )
+
+    playouts = data.get(
+        "playouts"
+    )
+
+    if playouts is not None:
+        playouts = min(
+            max(int(playouts), 1),
+            MAX_PLAYOUTS,
+        )
+
+    return engine, time_budget, playouts
+
+
+def ttt_reply(game, state):
+    game_over = game.terminal(state)
+
+    return {
+        "board": game.decode(state),
+        "state": game.token(state),
+        "next_player": (
+            None
+            if game_over
+            else game.player(state)
+        ),
+        "winner": game.winner(state),
+        "game_over": game_over,
+    }
+
+
+def ttt_square(move, rows, cols):
+    """
+    Returns the square index of move [i, j]. Raises ValueError if it
+    is off the board.
+    """
+    i, j = (int(v) for v in move)
+
+    if not (0 <= i < rows and 0 <= j < cols):
+        raise ValueError(
+            f"Move {[i, j]} is off the board."
+        )
+
+    return i * cols + j
+
+
+@app.route("/ttt/session", methods=["POST"])
+def ttt_session_start():
+    data = request.get_json(
+        silent=True
+    ) or {}
+
+    try:
+        rows, cols, k = ttt_shape(
+            data
+        )
+
+        engine, time_budget, playouts = ttt_engine_options(
+            data
+        )
+
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
+
+    session = ttt_sessions.add(
+        GameSession(
+            mnk.game_for(
+                rows,
+                cols,
+                k,
+            ),
+            engine,
+            time_budget,
+            playouts,
+        )
+    )
+
+    return jsonify({
+        "session": session.id,
+        "rows": rows,
+        "cols": cols,
+        "k": k,
+        "engine": engine,
+        **ttt_reply(
+            session.game,
+            session.state,
+        ),
+    })
+
+
+@app.route("/ttt/session/<session_id>", methods=["DELETE"])
+def ttt_session_end(session_id):
+    if not ttt_sessions.discard(session_id):
+        return jsonify({
+            "error": "Unknown or expired session."
+        }), 404
+
     return jsonify({
-        "board": initial_state()
+        "status": "deleted"
     })
 
 
+@app.route("/ttt/session/stats", methods=["GET"])
+def ttt_session_stats():
+    return jsonify(
+        ttt_sessions.stats()
+    )
+
+
+def ttt_session_move(data):
+    """
+    /ttt/move for a server-side session: the client sends only the
+    session id and its move.
+    """
+    try:
+        session = ttt_sessions.get(
+            data.get("session")
+        )
+
+    except (KeyError, TypeError):
+        return jsonify({
+            "error": "Unknown or expired session."
+        }), 404
+
+    game = session.game
+
+    try:
+        square = ttt_square(
+            data.get("move"),
+            game.rows,
+            game.cols,
+        )
+
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
+
+    # One move at a time per game.
+    with session.lock:
+        try:
+            if game.terminal(session.state):
+                raise ValueError(
+                    "Game is over."
+                )
+
+            state = session.play(
+                square
+            )
+
+            return jsonify({
+                "session": session.id,
+                **ttt_reply(
+                    game,
+                    state,
+                ),
+            })
+
+        except ValueError as e:
+            return jsonify({
+                "error": str(e)
+            }), 400
+
+        except SearchUnavailable as e:
+            return jsonify({
+                "error": str(e)
+            }), 503
+
+        except Exception as e:
+            return jsonify({
+                "error": str(e)
+            }), 500
+
+
 @app.route("/ttt/move", methods=["POST"])
 def ttt_move():
-    from ttt.ttt_logic import minimax
-
     data = request.get_json()
 
+    if "session" in data:
+        return ttt_session_move(
+            data
+        )
+
     board = data.get("board")
+    token = data.get("state")
     move = data.get("move")
 
-    if board is None or move is None:
+    if (board is None and token is None) or move is None:
         return jsonify({
             "error": "Missing board or move."
         }), 400
 
     try:
-        # Apply player's move as X.
-        new_board = result(
+        rows, cols, k = ttt_shape(
+            data,
             board,
-            tuple(move),
-            forced_player="X",
         )
 
-        if terminal(new_board):
-            return jsonify({
-                "board": new_board,
-                "next_player": None,
-                "winner": winner(new_board),
-                "game_over": True,
-            })
+        engine, time_budget, playouts = ttt_engine_options(
+            data
+        )
+
+        game = mnk.game_for(
+            rows,
+            cols,
+            k,
+        )
+
+        # The compact token decodes straight to bitboards; the legacy
+        # board is encoded once.
+        if board is not None:
+            state = game.encode(board)
+        else:
+            state = game.from_token(token)
+
+        square = ttt_square(
+            move,
+            rows,
+            cols,
+        )
+
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
 
-        # AI move as O.
-        ai_move = minimax(
-            new_board
+    try:
+        # Apply player's move as X.
+        state = game.place(
+            state,
+            square,
+            "X",
         )
 
-        if ai_move is not None:
-            new_board = result(
-                new_board,
-                ai_move,
-                forced_player="O",
+        if not game.terminal(state):
+            # AI move as O.
+            ai_square = ai_move(
+                engine,
+                game,
+                state,
+                time_budget,
+                playouts,
+            )
+
+            if ai_square is not None:
+                state = game.place(
+                    state,
+                    ai_square,
+                    "O",
+                )
+
+        return jsonify(
+            ttt_reply(
+                game,
+                state,
             )
+        )
 
+    except ValueError as e:
         return jsonify({
-            "board": new_board,
-            "next_player": (
-                None
-                if terminal(new_board)
-                else player(new_board)
-            ),
-            "winner": winner(new_board),
-            "game_over": terminal(new_board),
-        })
+            "error": str(e)
+        }), 400
+
+    except SearchUnavailable as e:
+        return jsonify({
+            "error": str(e)
+        }), 503
 
     except Exception as e:
         return jsonify({
@@ -0,0 +1,171 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from .maze_cache import load_maze
+from .maze_executor import (
+    POLL_SECONDS,
+    SOLVERS,
+    SolveCancelled,
+    SolverBusy,
+    SolverUnavailable,
+)
+from .maze_loader import preferred_path
+from .maze_output import save_image
+from .maze_solver import TEXT_FORMATS
+
+MAX_BATCH_JOBS = 1000
+
+
+def solve_file(path, algorithm, text_format="none", image=False):
+    """
+    Worker-side batch job: solves the maze at path and returns its
+    result record without the job identity fields. The maze is parsed
+    through the worker's maze cache, so each worker parses a file at
+    most once however many jobs use it.
+    """
+    began = time.perf_counter()
+    maze = load_maze(path)
+    parse_ms = (time.perf_counter() - began) * 1000
+
+    m = maze.copy()
+    began = time.perf_counter()
+    for _ in m.iter_search(algorithm):
+        pass
+    record = {
+        "states_explored": m.num_explored,
+        "path_length": len(m.solution[1]),
+        "parse_ms": parse_ms,
+        "solve_ms": (time.perf_counter() - began) * 1000,
+    }
+    if text_format != "none":
+        record["text"] = m.format_text(text_format)
+    if image:
+        record["image"] = save_image(m.image_bytes(show_explored=True))
+    return record
+
+
+def parse_jobs(jobs, maze_dir):
+    """
+    Validates the request's job list. Returns (valid, invalid): valid
+    is a list of (index, maze, path, algorithm, options) and invalid a
+    list of error records.
+    """
+    valid, invalid = [], []
+    for index, job in enumerate(jobs):
+        if isinstance(job, (list, tuple)):
+            job = dict(zip(("maze", "algorithm", "options"), job))
+        if not isinstance(job, dict):
+            invalid.append({"index": index, "error": "Job must be an object."})
+            continue
+
+        maze = job.get("maze")
+        algorithm = job.get("algorithm")
+        options = job.get("options") or {}
+        record = {"index": index, "maze": maze, "algorithm": algorithm}
+
+        if not isinstance(maze, str) or not maze.endswith(".txt"):
+            invalid.append({**record, "error": "Invalid maze file"})
+            continue
+        path = preferred_path(os.path.join(maze_dir, maze))
+        if not os.path.exists(path):
+            invalid.append({**record, "error": "Maze file not found."})
+            continue
+        if algorithm not in SOLVERS:
+            invalid.append({**record, "error": "Unknown algorithm."})
+            continue
+        if not isinstance(options, dict):
+            invalid.append({**record, "error": "Options must be an object."})
+            continue
+        options = {
+            "text_format": options.get("text_format", "none"),
+            "image": bool(options.get("image", False)),
+        }
+        if options["text_format"] not in TEXT_FORMATS:
+            invalid.append({**record, "error": "Unknown text format."})
+            continue
+
+        valid.append((index, maze, path, algorithm, options))
+    return valid, invalid
+
+
+def run_batch(pool, jobs, disconnected=None):
+    """
+    Runs (index, maze, path, algorithm, options) jobs on pool and
+    yields one record per job as it finishes.
+
+    Jobs carry only the maze path; mazes are parsed in the workers
+    (see solve_file), so this process holds no parsed maze and sends
+    none between processes. Jobs are submitted as pool slots become
+    free, so a batch never exceeds the pool's pending-job limit, nor
+    its limit for batch jobs, which leaves slots for single solves.
+    Waiting jobs fail with a busy error if no slot frees up within
+    the pool's queue time.
+    """
+    pending = deque()
+    for index, maze, path, algorithm, options in jobs:
+        record = {"index": index, "maze": maze, "algorithm": algorithm}
+        pending.append((record, path, algorithm, options))
+
+    in_flight = {}
+    stalled_since = None
+    try:
+        while pending or in_flight:
+            while pending:
+                record, path, algorithm, options = pending[0]
+                try:
+                    future, slot = pool.submit_batch(solve_file, path, algorithm, **options)
+                except SolverBusy:
+                    break
+                except SolverUnavailable as e:
+                    pending.popleft()
+                    yield {**record, "error": str(e)}
+                    continue
+                pending.popleft()
+                in_flight[future] = (
+                    record,
+                    slot,
+                    time.monotonic(),
+                    pool.deadline(),
+                )
+                stalled_since = None
+
+            if disconnected is not None and disconnected():
+                raise SolveCancelled("Client disconnected.")
+
+            if not in_flight:
+                # Every slot is taken by other requests.
+                stalled_since = stalled_since or time.monotonic()
+                if time.monotonic() - stalled_since > pool.queue_seconds:
+                    while pending:
+                        yield {**pending.popleft()[0], "error": "Too many pending solves."}
+                    return
+                time.sleep(POLL_SECONDS)
+                continue
+
+            done, _ = wait(in_flight, timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future in done:
+                record, _, submitted, _ = in_flight.pop(future)
+                record["wall_ms"] = (now - submitted) * 1000
+                try:
+                    record.update(future.result())
+                except BrokenProcessPool as e:
+                    record["error"] = f"Solver pool failed: {e}"
+                except Exception as e:
+                    record["error"] = str(e)
+                yield record
+
+            for future, (record, slot, _, deadline) in list(in_flight.items()):
+                if now > deadline:
+                    pool.cancel(future, slot)
+                    del in_flight[future]
+                    yield {**record, "error": "Solve timed out."}
+    finally:
+        # Runs on client disconnect and when the response generator is
+        # closed early.
+        for future, (_, slot, _, _) in in_flight.items():
+            if not future.done():
+                pool.cancel(future, slot)
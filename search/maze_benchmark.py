@@ -0,0 +1,152 @@
+"""
+Benchmarks Maze parsing, solving, text and image output on generated
+mazes and prints one JSON record per maze and algorithm.
+
+    python -m search.maze_benchmark --sizes 10 100 1000 --output bench.jsonl
+
+Each record holds the generator, size, seed, algorithm, the seconds
+spent in parse/solve/text/render, states explored, path length and
+peak traced memory in bytes. Memory is measured in a separate
+tracemalloc pass so that tracing does not distort the timings.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .maze_generator import GENERATORS, generate, write_maze
+from .maze_solver import Maze
+
+ALGORITHMS = ("stack", "queue", "astar", "greedy", "bidirectional")
+DEFAULT_SIZES = (10, 50, 100, 500, 1000)
+# Renders are scaled down so the image stays around this many pixels
+# on its longest side.
+MAX_IMAGE_SIDE = 4096
+
+
+def render_cell_size(maze):
+    return max(1, min(50, MAX_IMAGE_SIDE // max(maze.width, maze.height)))
+
+
+def run_phases(filename, algorithm, image_path):
+    """
+    Runs every phase once and returns (timings, maze).
+    """
+    timings = {}
+
+    began = time.perf_counter()
+    m = Maze(filename)
+    timings["parse_s"] = time.perf_counter() - began
+
+    began = time.perf_counter()
+    for _ in m.iter_search(algorithm):
+        pass
+    timings["solve_s"] = time.perf_counter() - began
+
+    began = time.perf_counter()
+    m.as_text()
+    timings["text_s"] = time.perf_counter() - began
+
+    cell_size = render_cell_size(m)
+    began = time.perf_counter()
+    m.output_image(
+        image_path,
+        show_explored=True,
+        cell_size=cell_size,
+        cell_border=min(2, cell_size // 4),
+    )
+    timings["render_s"] = time.perf_counter() - began
+
+    return timings, m
+
+
+def peak_memory(filename, algorithm, image_path):
+    tracemalloc.start()
+    try:
+        run_phases(filename, algorithm, image_path)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(sizes, generators, algorithms, seed=0, repeat=1,
+              memory=True, workdir=None):
+    """
+    Yields one result dict per (generator, size, algorithm). Timings are
+    the best of repeat runs.
+    """
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        image_path = os.path.join(tmp, "bench.png")
+        for kind in generators:
+            for size in sizes:
+                filename = os.path.join(tmp, f"{kind}_{size}.txt")
+                write_maze(filename, generate(kind, size, size, seed))
+
+                for algorithm in algorithms:
+                    record = {
+                        "generator": kind,
+                        "width": size,
+                        "height": size,
+                        "seed": seed,
+                        "algorithm": algorithm,
+                    }
+                    try:
+                        best = None
+                        for _ in range(repeat):
+                            timings, m = run_phases(filename, algorithm, image_path)
+                            if best is None:
+                                best = timings
+                            else:
+                                best = {
+                                    key: min(best[key], value)
+                                    for key, value in timings.items()
+                                }
+                        record.update(best)
+                        record["states_explored"] = m.num_explored
+                        record["path_length"] = len(m.solution[1])
+                        if memory:
+                            record["peak_bytes"] = peak_memory(
+                                filename, algorithm, image_path
+                            )
+                    except Exception as e:
+                        record["error"] = str(e)
+                    yield record
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--generators", nargs="+", choices=sorted(GENERATORS),
+                        default=sorted(GENERATORS))
+    parser.add_argument("--algorithms", nargs="+", choices=ALGORITHMS,
+                        default=ALGORITHMS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the tracemalloc peak memory pass")
+    parser.add_argument("--output", help="write JSON lines here instead of stdout")
+    args = parser.parse_args()
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for record in benchmark(
+            args.sizes,
+            args.generators,
+            args.algorithms,
+            seed=args.seed,
+            repeat=args.repeat,
+            memory=not args.no_memory,
+        ):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+from .maze_cache import solve_cached
+from .maze_solver import Maze
+
+def solve_bidirectional(filename, text_format="full"):
+    return solve_cached(filename, "bidirectional", Maze.solve_bidirectional, text_format)
@@ -0,0 +1,79 @@
+"""
+Converts mazes between the A/B/# text format and the packed binary
+format read by Maze (see search.maze_loader).
+
+    python -m search.maze_binary to-binary search/mazes/maze1.txt
+    python -m search.maze_binary to-text search/mazes/maze1.mazeb out.txt
+
+Routes that load mazes from search/mazes use the .mazeb file next to
+a .txt maze when it exists and is at least as new.
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from .maze_loader import (
+    BINARY_SUFFIX,
+    binary_path,
+    load_binary_file,
+    load_maze_file,
+    pack_walls,
+)
+
+
+def text_to_binary(filename, output=None):
+    """
+    Writes the packed binary version of a text maze and returns its path.
+    Wall characters other than "#" are normalised to walls.
+    """
+    output = output or binary_path(filename)
+    height, width, walls, start, goal = load_maze_file(filename)
+    data = pack_walls(width, height, walls, start, goal)
+
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, output)
+    return output
+
+
+def binary_to_text(filename, output=None):
+    """
+    Writes a binary maze back out in the text format and returns the
+    path. Short rows of the original text come back padded with spaces.
+    """
+    output = output or os.path.splitext(filename)[0] + ".txt"
+    height, width, walls, start, goal = load_binary_file(filename)
+
+    cells = bytearray(np.where(
+        np.frombuffer(walls, dtype=np.uint8) != 0, ord("#"), ord(" ")
+    ).astype(np.uint8))
+    cells[start[0] * width + start[1]] = ord("A")
+    cells[goal[0] * width + goal[1]] = ord("B")
+
+    with open(output, "w") as f:
+        for offset in range(0, len(cells), width):
+            f.write(cells[offset:offset + width].decode("ascii"))
+            f.write("\n")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("direction", choices=("to-binary", "to-text"))
+    parser.add_argument("input")
+    parser.add_argument("output", nargs="?")
+    args = parser.parse_args()
+
+    if args.direction == "to-binary":
+        print(text_to_binary(args.input, args.output))
+    else:
+        if not args.input.endswith(BINARY_SUFFIX):
+            parser.error(f"input must be a {BINARY_SUFFIX} file")
+        print(binary_to_text(args.input, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from .maze_output import save_image
+from .maze_solver import Maze
+
+MAZE_CACHE_BYTES = int(os.environ.get("MAZE_CACHE_BYTES", str(256 << 20)))
+
+# Rough cost of one step of a stored solution: an action name and a
+# cell tuple.
+SOLUTION_STEP_BYTES = 100
+
+
+def approximate_size(value):
+    """
+    Approximate bytes held by a cached value: the length of bytes and
+    text, the buffers of a maze or distance field, summed over dicts.
+    """
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(approximate_size(item) for item in value.values())
+    if isinstance(value, Maze):
+        size = len(value.walls) + len(value.explored)
+        if value.solution is not None:
+            size += len(value.solution[1]) * SOLUTION_STEP_BYTES
+        return size
+    if hasattr(value, "distances") and hasattr(value, "next_hops"):
+        # search.maze_field.DistanceField
+        return memoryview(value.distances).nbytes + memoryview(value.next_hops).nbytes
+    return 0
+
+
+class MazeCache():
+    """
+    LRU cache of maze artifacts keyed by the SHA-256 of the maze file.
+
+    The cache is bounded by the approximate size of its entries (see
+    approximate_size), since PNGs, text and parsed mazes grow with the
+    maze. A value larger than max_bytes on its own is returned but not
+    kept.
+
+    File digests are remembered per path together with the file's mtime
+    and size, so a file is only re-hashed after it changes on disk.
+    When the content of a path changes, every entry built from its old
+    digest is dropped.
+    """
+
+    def __init__(self, max_bytes=MAZE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        # key -> (value, approximate size)
+        self.entries = OrderedDict()
+        self.fingerprints = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def digest(self, filename):
+        stat = os.stat(filename)
+        fingerprint = (stat.st_mtime_ns, stat.st_size)
+
+        with self.lock:
+            known = self.fingerprints.get(filename)
+        if known is not None and known[0] == fingerprint:
+            return known[1]
+
+        sha = hashlib.sha256()
+        with open(filename, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+
+        with self.lock:
+            self.fingerprints[filename] = (fingerprint, digest)
+            if known is not None and known[1] != digest:
+                self.discard(known[1])
+        return digest
+
+    def discard(self, digest):
+        """
+        Drops every entry built from digest. Caller holds the lock.
+        """
+        for key in [key for key in self.entries if key[1] == digest]:
+            self.bytes -= self.entries.pop(key)[1]
+
+    def get_or_create(self, key, factory):
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key][0]
+            self.misses += 1
+
+        value = factory()
+        size = approximate_size(value)
+        if size > self.max_bytes:
+            return value
+
+        with self.lock:
+            if key in self.entries:
+                # Built twice concurrently; keep the newer copy.
+                self.bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.bytes -= evicted
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+            self.fingerprints.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+cache = MazeCache()
+
+
+def load_maze(filename):
+    """
+    Returns the parsed Maze for filename. The cached instance is shared,
+    so callers that solve it must work on ``copy()``.
+    """
+    digest = cache.digest(filename)
+    return cache.get_or_create(
+        ("maze", digest),
+        lambda: Maze(filename),
+    )
+
+
+def maze_image(filename):
+    """
+    Returns the PNG bytes of the unsolved maze.
+    """
+    digest = cache.digest(filename)
+    return cache.get_or_create(
+        ("image", digest),
+        lambda: load_maze(filename).image_bytes(show_solution=False),
+    )
+
+
+def solve_cached(filename, algorithm, search, text_format="full"):
+    """
+    Solves filename with search, a function that runs one algorithm on a
+    Maze, and returns the /solve payload with the text in text_format
+    (see Maze.format_text). Results are cached per maze digest and
+    algorithm, and text per format.
+    """
+    digest = cache.digest(filename)
+
+    def build():
+        m = load_maze(filename).copy()
+        search(m)
+        return {
+            "maze": m,
+            "png": m.image_bytes(show_explored=True),
+        }
+
+    entry = cache.get_or_create(("solve", digest, algorithm), build)
+    m = entry["maze"]
+    text = cache.get_or_create(
+        ("text", digest, algorithm, text_format),
+        lambda: m.format_text(text_format),
+    )
+    return {
+        "states_explored": m.num_explored,
+        "text": text,
+        "text_format": text_format,
+        "image": save_image(entry["png"])
+    }
@@ -0,0 +1,390 @@
+import multiprocessing
+import os
+import queue
+import resource
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from .maze_astar import solve_astar
+from .maze_bidirectional import solve_bidirectional
+from .maze_cache import cache
+from .maze_greedy import solve_greedy
+from .maze_queue import solve_queue
+from .maze_stack import solve_stack
+
+SOLVERS = {
+    "stack": solve_stack,
+    "queue": solve_queue,
+    "astar": solve_astar,
+    "greedy": solve_greedy,
+    "bidirectional": solve_bidirectional,
+}
+
+POLL_SECONDS = 0.1
+# Frames a streaming job may have in flight before it waits for the
+# web process to catch up.
+STREAM_QUEUE_FRAMES = 64
+# Extra wall-clock time the web process waits for a worker to report its
+# own timeout before giving up on the job.
+TIMEOUT_GRACE_SECONDS = 2
+
+
+class SolverBusy(Exception):
+    """Raised when the pending-job limit is reached."""
+
+
+class SolverUnavailable(Exception):
+    """Raised when the worker pool has died."""
+
+
+class SolveTimeout(Exception):
+    """Raised when a job exceeds its CPU or wall-clock budget."""
+
+
+class SolveCancelled(Exception):
+    """Raised when a job is cancelled because its client went away."""
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+cancel_flags = None
+job_pids = None
+frame_queues = None
+cache_counters = None
+current_slot = None
+
+
+def init_worker(flags, pids, queues, counters, memory_bytes):
+    global cancel_flags, job_pids, frame_queues, cache_counters
+
+    cancel_flags = flags
+    job_pids = pids
+    frame_queues = queues
+    cache_counters = counters
+    if memory_bytes:
+        # A job that needs more fails with MemoryError instead of
+        # getting the worker OOM-killed, which would break the pool.
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            memory_bytes = min(memory_bytes, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, hard))
+    signal.signal(signal.SIGPROF, on_timer)
+    signal.signal(signal.SIGALRM, on_timer)
+    signal.signal(signal.SIGUSR1, on_cancel)
+
+
+def on_timer(signum, frame):
+    if current_slot is None:
+        return
+    budget = "CPU" if signum == signal.SIGPROF else "wall-clock"
+    raise SolveTimeout(f"Solve exceeded its {budget} time limit.")
+
+
+def on_cancel(signum, frame):
+    # The signal may arrive after this worker has moved on to another
+    # job, so only stop if the current job was the one cancelled.
+    if current_slot is not None and cancel_flags[current_slot]:
+        raise SolveCancelled("Solve cancelled.")
+
+
+def send_frame(job, frame):
+    """
+    Sends one frame of a streaming job back to the web process. Blocks
+    while the job's queue is full, so a slow client slows the job down
+    rather than filling memory; the job's timers still apply.
+    """
+    frame_queues[current_slot].put((job, frame))
+
+
+def run_job(function, args, kwargs, slot, cpu_seconds, wall_seconds):
+    global current_slot
+
+    current_slot = slot
+    job_pids[slot] = os.getpid()
+    hits, misses = cache.hits, cache.misses
+    try:
+        if cancel_flags[slot]:
+            raise SolveCancelled("Solve cancelled.")
+        signal.setitimer(signal.ITIMER_PROF, cpu_seconds)
+        signal.setitimer(signal.ITIMER_REAL, wall_seconds)
+        return function(*args, **kwargs)
+    finally:
+        current_slot = None
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        job_pids[slot] = 0
+        # Each worker has its own maze cache; the pool keeps the totals.
+        with cache_counters.get_lock():
+            cache_counters[0] += cache.hits - hits
+            cache_counters[1] += cache.misses - misses
+
+
+# ---------------------------------------------------------------------------
+# Web process side
+# ---------------------------------------------------------------------------
+
+class SolverPool():
+    """
+    Runs maze solves in a bounded ProcessPoolExecutor.
+
+    At most max_pending jobs may be queued or running; further jobs are
+    rejected with SolverBusy. A job keeps its slot until it has really
+    finished in the worker, even if the request waiting on it has given
+    up. Each job runs under per-job CPU and wall-clock limits enforced
+    with interval timers inside the worker, and can be cancelled while
+    queued or running. When memory_bytes is set, each worker's address
+    space is limited to that many bytes.
+
+    Batch jobs (see submit_batch) may hold at most batch_slots of the
+    slots between them, by default all but one, so a large batch
+    cannot shut single solves out.
+
+    The workers' maze cache hits and misses are added up in shared
+    memory; see cache_stats.
+
+    Streaming jobs (see stream) pass their output back through one
+    bounded queue per slot. Frames are tagged with a job number, since
+    a cancelled job may leave frames behind for the slot's next user.
+    """
+
+    def __init__(self, workers=None, max_pending=None, cpu_seconds=10,
+                 wall_seconds=20, queue_seconds=10, memory_bytes=None,
+                 batch_slots=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.workers
+        self.batch_slots = batch_slots or max(self.max_pending - 1, 1)
+        self.batch_jobs = 0
+        self.cpu_seconds = cpu_seconds
+        self.wall_seconds = wall_seconds
+        self.queue_seconds = queue_seconds
+        self.memory_bytes = memory_bytes
+        self.lock = threading.Lock()
+        self.executor = None
+        self.free_slots = list(range(self.max_pending))
+        self.cancel_flags = multiprocessing.Array("b", self.max_pending, lock=False)
+        self.job_pids = multiprocessing.Array("i", self.max_pending, lock=False)
+        self.cache_counters = multiprocessing.Array("q", 2)
+        self.frame_queues = [
+            multiprocessing.Queue(STREAM_QUEUE_FRAMES)
+            for _ in range(self.max_pending)
+        ]
+        self.jobs = 0
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=init_worker,
+                    initargs=(
+                        self.cancel_flags,
+                        self.job_pids,
+                        self.frame_queues,
+                        self.cache_counters,
+                        self.memory_bytes,
+                    ),
+                )
+            return self.executor
+
+    def reset_executor(self, executor):
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def acquire_slot(self, batch=False):
+        with self.lock:
+            if not self.free_slots:
+                raise SolverBusy("Too many pending solves.")
+            if batch:
+                if self.batch_jobs >= self.batch_slots:
+                    raise SolverBusy("Too many pending batch solves.")
+                self.batch_jobs += 1
+            slot = self.free_slots.pop()
+        self.cancel_flags[slot] = 0
+        return slot
+
+    def release_slot(self, slot, batch=False):
+        with self.lock:
+            self.free_slots.append(slot)
+            if batch:
+                self.batch_jobs -= 1
+
+    def cancel(self, future, slot):
+        future.cancel()
+        self.cancel_flags[slot] = 1
+        pid = self.job_pids[slot]
+        if pid:
+            try:
+                os.kill(pid, signal.SIGUSR1)
+            except ProcessLookupError:
+                pass
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Submits function(*args, **kwargs) to the pool under the job
+        limits and returns (future, slot). function must be picklable,
+        i.e. defined at module level.
+        """
+        return self.submit_job(function, args, kwargs)
+
+    def submit_batch(self, function, *args, **kwargs):
+        """
+        Like submit, for one job of a batch: it also counts against
+        batch_slots.
+        """
+        return self.submit_job(function, args, kwargs, batch=True)
+
+    def submit_job(self, function, args, kwargs, batch=False):
+        slot = self.acquire_slot(batch)
+        executor = self.get_executor()
+        try:
+            future = executor.submit(
+                run_job, function, args, kwargs, slot,
+                self.cpu_seconds, self.wall_seconds,
+            )
+        except (BrokenProcessPool, RuntimeError) as exc:
+            self.release_slot(slot, batch)
+            self.reset_executor(executor)
+            raise SolverUnavailable(str(exc)) from exc
+
+        def on_done(done):
+            self.release_slot(slot, batch)
+            if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+                self.reset_executor(executor)
+
+        future.add_done_callback(on_done)
+        return future, slot
+
+    def cache_stats(self):
+        """
+        Maze cache hits and misses summed over every job the workers
+        have run. Each worker has its own cache of up to the same size.
+        """
+        with self.cache_counters.get_lock():
+            hits, misses = self.cache_counters[:]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "workers": self.workers,
+        }
+
+    def deadline(self):
+        """
+        Latest time to wait for a job submitted now: queueing plus the
+        wall-clock budget, plus a grace period for the worker to report
+        its own timeout.
+        """
+        return (
+            time.monotonic()
+            + self.queue_seconds
+            + self.wall_seconds
+            + TIMEOUT_GRACE_SECONDS
+        )
+
+    def solve(self, algorithm, filename, disconnected=None, **options):
+        """
+        Runs SOLVERS[algorithm](filename, **options) in the pool and
+        returns its result; see run.
+        """
+        if algorithm not in SOLVERS:
+            raise KeyError(algorithm)
+
+        return self.run(
+            SOLVERS[algorithm], filename, disconnected=disconnected, **options
+        )
+
+    def run(self, function, *args, disconnected=None, **kwargs):
+        """
+        Runs function(*args, **kwargs) in the pool and returns its
+        result. disconnected is polled while waiting; when it returns
+        True the job is cancelled and SolveCancelled is raised.
+        """
+        future, slot = self.submit(function, *args, **kwargs)
+        deadline = self.deadline()
+        try:
+            while True:
+                try:
+                    return future.result(timeout=POLL_SECONDS)
+                except TimeoutError:
+                    pass
+                if disconnected is not None and disconnected():
+                    raise SolveCancelled("Client disconnected.")
+                if time.monotonic() > deadline:
+                    raise SolveTimeout("Solve timed out.")
+        except BrokenProcessPool as exc:
+            raise SolverUnavailable(str(exc)) from exc
+        finally:
+            if not future.done():
+                self.cancel(future, slot)
+
+    def stream(self, function, *args, **kwargs):
+        """
+        Runs function(job, *args, **kwargs) in the pool and yields the
+        frames it sends with send_frame(job, frame) as they arrive.
+        function must send None as its last frame. Errors raised by
+        the job are raised here once its earlier frames are yielded.
+        Closing the generator cancels the job.
+        """
+        with self.lock:
+            self.jobs += 1
+            job = self.jobs
+
+        future, slot = self.submit(function, job, *args, **kwargs)
+        frames = self.frame_queues[slot]
+        deadline = self.deadline()
+        try:
+            while True:
+                try:
+                    tag, frame = frames.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    # A job that failed sends no final frame.
+                    if future.done() and future.exception() is not None:
+                        future.result()
+                    if time.monotonic() > deadline:
+                        raise SolveTimeout("Solve timed out.")
+                    continue
+                if tag != job:
+                    continue
+                if frame is None:
+                    return
+                yield frame
+        except BrokenProcessPool as exc:
+            raise SolverUnavailable(str(exc)) from exc
+        finally:
+            if not future.done():
+                self.cancel(future, slot)
+
+
+def client_disconnected(environ):
+    """
+    Returns True when the client socket behind a WSGI request has been
+    closed. Servers that do not expose their socket are treated as
+    always connected.
+    """
+    sock = environ.get("gunicorn.socket") or environ.get("werkzeug.socket")
+    if sock is None:
+        return False
+    try:
+        return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b""
+    except (BlockingIOError, InterruptedError):
+        return False
+    except OSError:
+        return True
+
+
+solver_pool = SolverPool(
+    workers=int(os.environ.get("MAZE_SOLVER_WORKERS", "0")) or None,
+    max_pending=int(os.environ.get("MAZE_SOLVER_MAX_PENDING", "0")) or None,
+    cpu_seconds=float(os.environ.get("MAZE_SOLVE_CPU_SECONDS", "10")),
+    wall_seconds=float(os.environ.get("MAZE_SOLVE_WALL_SECONDS", "20")),
+    queue_seconds=float(os.environ.get("MAZE_SOLVE_QUEUE_SECONDS", "10")),
+    memory_bytes=int(os.environ.get("MAZE_SOLVER_MEMORY_BYTES", str(2 << 30))) or None,
+    batch_slots=int(os.environ.get("MAZE_SOLVER_BATCH_SLOTS", "0")) or None,
+)
@@ -0,0 +1,320 @@
+import heapq
+import os
+import tempfile
+import zipfile
+from array import array
+from collections import deque
+
+import numpy as np
+
+from .maze_cache import cache, load_maze
+
+FIELD_SUFFIX = ".field.npz"
+
+# Next-hop codes, stored as one byte per cell.
+NO_HOP = 0
+HOP_ACTIONS = (None, "up", "down", "left", "right")
+
+
+class DistanceField():
+    """
+    Shortest-path distances to the goal of one maze, plus the direction
+    to move from every reachable cell.
+
+    Built with a single breadth-first search from the goal, after which
+    the path from any start cell is read off in O(path length).
+    distances holds -1 for walls and cells that cannot reach the goal.
+    """
+
+    def __init__(self, width, height, goal, distances, next_hops):
+        self.width = width
+        self.height = height
+        self.goal = goal
+        self.distances = distances
+        self.next_hops = next_hops
+
+    @classmethod
+    def build(cls, maze):
+        size = len(maze.walls)
+        width = maze.width
+        distances = array("i", [-1]) * size
+        next_hops = bytearray(size)
+
+        goal = maze.index(maze.goal)
+        distances[goal] = 0
+        queue = deque([goal])
+        while queue:
+            index = queue.popleft()
+            distance = distances[index] + 1
+            for neighbor in maze.neighbor_indices(index):
+                if distances[neighbor] != -1:
+                    continue
+                distances[neighbor] = distance
+                # Direction from neighbor back towards index.
+                delta = index - neighbor
+                if delta == -width:
+                    next_hops[neighbor] = 1
+                elif delta == width:
+                    next_hops[neighbor] = 2
+                elif delta == -1:
+                    next_hops[neighbor] = 3
+                else:
+                    next_hops[neighbor] = 4
+                queue.append(neighbor)
+
+        return cls(
+            width,
+            maze.height,
+            maze.goal,
+            np.frombuffer(distances, dtype=np.int32),
+            np.frombuffer(next_hops, dtype=np.uint8),
+        )
+
+    def copy(self):
+        return DistanceField(
+            self.width,
+            self.height,
+            self.goal,
+            self.distances.copy(),
+            self.next_hops.copy(),
+        )
+
+    def update(self, maze, index):
+        """
+        Repairs the field after the wall at index changed in maze and
+        returns the number of cells whose distance was recomputed.
+
+        Unit-cost counterpart of LPA*/D* Lite: only the cells whose
+        shortest path can change are touched, so the work is
+        proportional to the size of the change rather than the maze.
+        """
+        if maze.walls[index]:
+            return self.wall_added(maze, index)
+        return self.wall_removed(maze, index)
+
+    def set_hop(self, index, target):
+        delta = target - index
+        if delta == -self.width:
+            self.next_hops[index] = 1
+        elif delta == self.width:
+            self.next_hops[index] = 2
+        elif delta == -1:
+            self.next_hops[index] = 3
+        else:
+            self.next_hops[index] = 4
+
+    def hop_target(self, index):
+        return index + (0, -self.width, self.width, -1, 1)[self.next_hops[index]]
+
+    def open_neighbors(self, maze, index):
+        """
+        Like Maze.neighbor_indices, but index itself may be a wall.
+        """
+        width = self.width
+        col = index % width
+        candidates = [index - width, index + width]
+        if col > 0:
+            candidates.append(index - 1)
+        if col < width - 1:
+            candidates.append(index + 1)
+        return [
+            n for n in candidates
+            if 0 <= n < len(maze.walls) and not maze.walls[n]
+        ]
+
+    def wall_added(self, maze, index):
+        distances = self.distances
+        if distances[index] < 0:
+            return 0
+
+        # Cells whose next-hop chain runs through the new wall are the
+        # only ones whose distance can grow.
+        affected = {index}
+        stack = [index]
+        while stack:
+            cell = stack.pop()
+            for neighbor in self.open_neighbors(maze, cell):
+                if (neighbor not in affected
+                        and distances[neighbor] >= 0
+                        and self.hop_target(neighbor) == cell):
+                    affected.add(neighbor)
+                    stack.append(neighbor)
+
+        for cell in affected:
+            distances[cell] = -1
+            self.next_hops[cell] = NO_HOP
+
+        # Seed each affected cell from its best unaffected neighbour,
+        # then run Dijkstra inside the affected region only.
+        heap = []
+        for cell in affected:
+            if cell == index:
+                continue
+            for neighbor in self.open_neighbors(maze, cell):
+                if neighbor not in affected and distances[neighbor] >= 0:
+                    heapq.heappush(heap, (int(distances[neighbor]) + 1, cell, neighbor))
+
+        while heap:
+            distance, cell, via = heapq.heappop(heap)
+            if distances[cell] >= 0:
+                continue
+            distances[cell] = distance
+            self.set_hop(cell, via)
+            for neighbor in self.open_neighbors(maze, cell):
+                if neighbor in affected and distances[neighbor] < 0:
+                    heapq.heappush(heap, (distance + 1, neighbor, cell))
+
+        return len(affected)
+
+    def wall_removed(self, maze, index):
+        distances = self.distances
+        best = None
+        for neighbor in self.open_neighbors(maze, index):
+            if distances[neighbor] >= 0 and (
+                    best is None or distances[neighbor] < distances[best]):
+                best = neighbor
+        if best is None:
+            return 0
+
+        distances[index] = distances[best] + 1
+        self.set_hop(index, best)
+
+        # Distances can only shrink; spread the improvement outwards
+        # breadth-first from the opened cell.
+        updated = 1
+        queue = deque([index])
+        while queue:
+            cell = queue.popleft()
+            distance = distances[cell] + 1
+            for neighbor in self.open_neighbors(maze, cell):
+                if distances[neighbor] < 0 or distances[neighbor] > distance:
+                    distances[neighbor] = distance
+                    self.set_hop(neighbor, cell)
+                    queue.append(neighbor)
+                    updated += 1
+        return updated
+
+    def save(self, filename, digest):
+        # Write through a temporary file so readers never see half a field.
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(filename) or ".",
+            suffix=".tmp",
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    digest=np.array(digest),
+                    shape=np.array([self.height, self.width, *self.goal]),
+                    distances=self.distances,
+                    next_hops=self.next_hops,
+                )
+            os.replace(tmp_path, filename)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, filename, digest):
+        """
+        Returns the field stored in filename, or None if it is missing,
+        corrupt or was built from a different maze digest.
+        """
+        try:
+            with np.load(filename) as data:
+                if str(data["digest"]) != digest:
+                    return None
+                height, width, goal_row, goal_col = data["shape"].tolist()
+                return cls(
+                    width,
+                    height,
+                    (goal_row, goal_col),
+                    data["distances"],
+                    data["next_hops"],
+                )
+        except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+
+    def index(self, state):
+        row, col = state
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise ValueError(f"Cell {state} is outside the maze.")
+        return row * self.width + col
+
+    def distance(self, start):
+        """
+        Returns the number of moves from start to the goal, or None if
+        start is a wall or cannot reach the goal.
+        """
+        distance = int(self.distances[self.index(start)])
+        return None if distance < 0 else distance
+
+    def path_from(self, start):
+        """
+        Returns (actions, cells) from start to the goal, in the same
+        shape as Maze.solution.
+        """
+        index = self.index(start)
+        if self.distances[index] < 0:
+            raise ValueError(f"No path from {tuple(start)} to the goal.")
+
+        width = self.width
+        deltas = (0, -width, width, -1, 1)
+        next_hops = self.next_hops
+        actions, cells = [], []
+        for _ in range(int(self.distances[index])):
+            hop = next_hops[index]
+            index += deltas[hop]
+            actions.append(HOP_ACTIONS[hop])
+            cells.append(divmod(index, width))
+        return actions, cells
+
+
+def field_path(filename):
+    return filename + FIELD_SUFFIX
+
+
+def query_paths(filename, starts):
+    """
+    Solver pool job for /maze-path: returns one record per start cell,
+    {"start", "distance", "actions", "cells"} or {"start", "error"}
+    for a bad or unreachable start.
+    """
+    field = load_field(filename)
+    paths = []
+    for start in starts:
+        try:
+            row, col = (int(v) for v in start)
+            actions, cells = field.path_from((row, col))
+            paths.append({
+                "start": [row, col],
+                "distance": len(actions),
+                "actions": actions,
+                "cells": cells,
+            })
+        except (TypeError, ValueError) as e:
+            paths.append({"start": start, "error": str(e)})
+    return paths
+
+
+def load_field(filename):
+    """
+    Returns the DistanceField for a maze file. It is read from the
+    persisted field next to the maze when that matches the maze's
+    current content, and otherwise built and saved there.
+    """
+    digest = cache.digest(filename)
+
+    def build():
+        stored = field_path(filename)
+        field = DistanceField.load(stored, digest)
+        if field is None:
+            field = DistanceField.build(load_maze(filename))
+            try:
+                field.save(stored, digest)
+            except OSError:
+                # A read-only maze directory only loses persistence.
+                pass
+        return field
+
+    return cache.get_or_create(("field", digest), build)
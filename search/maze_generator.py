@@ -0,0 +1,162 @@
+"""
+Random maze generator writing the A/B/# text format read by Maze.
+
+    python -m search.maze_generator backtracker 101 101 maze.txt --seed 1
+
+Generators:
+
+    backtracker  recursive backtracker (iterative DFS), long corridors
+    prim         randomized Prim's algorithm, many short dead ends
+    rooms        open rooms joined by single-cell doors
+"""
+
+import argparse
+import random
+
+WALL = ord("#")
+OPEN = ord(" ")
+
+STEPS = ((-2, 0), (2, 0), (0, -2), (0, 2))
+
+
+class Grid():
+    """
+    Character grid stored as one bytearray, row * width + col.
+    """
+
+    def __init__(self, width, height, fill=WALL):
+        if width < 3 or height < 3:
+            raise ValueError("Maze must be at least 3x3.")
+        self.width = width
+        self.height = height
+        self.cells = bytearray([fill]) * (width * height)
+
+    def is_cell(self, row, col):
+        # Carvable cells sit on odd coordinates, away from the border.
+        return 0 < row < self.height - 1 and 0 < col < self.width - 1
+
+    def carve(self, row, col):
+        self.cells[row * self.width + col] = OPEN
+
+    def is_open(self, row, col):
+        return self.cells[row * self.width + col] == OPEN
+
+    def lines(self):
+        width = self.width
+        cells = self.cells
+        first = cells.index(OPEN)
+        last = cells.rindex(OPEN)
+        cells[first] = ord("A")
+        cells[last] = ord("B")
+        return [
+            cells[offset:offset + width].decode("ascii")
+            for offset in range(0, len(cells), width)
+        ]
+
+
+def backtracker(width, height, rng):
+    grid = Grid(width, height)
+    grid.carve(1, 1)
+    stack = [(1, 1)]
+    while stack:
+        row, col = stack[-1]
+        options = [
+            (row + dr, col + dc)
+            for dr, dc in STEPS
+            if grid.is_cell(row + dr, col + dc)
+            and not grid.is_open(row + dr, col + dc)
+        ]
+        if not options:
+            stack.pop()
+            continue
+        next_row, next_col = rng.choice(options)
+        grid.carve((row + next_row) // 2, (col + next_col) // 2)
+        grid.carve(next_row, next_col)
+        stack.append((next_row, next_col))
+    return grid.lines()
+
+
+def prim(width, height, rng):
+    grid = Grid(width, height)
+    grid.carve(1, 1)
+    frontier = [((1 + dr, 1 + dc), (1, 1)) for dr, dc in STEPS]
+    while frontier:
+        # Swap-remove a random entry.
+        position = rng.randrange(len(frontier))
+        frontier[position], frontier[-1] = frontier[-1], frontier[position]
+        (row, col), (from_row, from_col) = frontier.pop()
+        if not grid.is_cell(row, col) or grid.is_open(row, col):
+            continue
+        grid.carve((row + from_row) // 2, (col + from_col) // 2)
+        grid.carve(row, col)
+        for dr, dc in STEPS:
+            if grid.is_cell(row + dr, col + dc) and not grid.is_open(row + dr, col + dc):
+                frontier.append(((row + dr, col + dc), (row, col)))
+    return grid.lines()
+
+
+def rooms(width, height, rng, room_size=None):
+    grid = Grid(width, height, fill=OPEN)
+    room_size = room_size or max(4, min(width, height) // 8)
+
+    for col in range(width):
+        grid.cells[col] = WALL
+        grid.cells[(height - 1) * width + col] = WALL
+    for row in range(height):
+        grid.cells[row * width] = WALL
+        grid.cells[row * width + width - 1] = WALL
+
+    wall_rows = list(range(room_size, height - 2, room_size))
+    wall_cols = list(range(room_size, width - 2, room_size))
+    for row in wall_rows:
+        grid.cells[row * width:(row + 1) * width] = bytes([WALL]) * width
+    for col in wall_cols:
+        for row in range(height):
+            grid.cells[row * width + col] = WALL
+
+    # One door in every wall segment between two neighbouring rooms
+    # keeps the whole grid of rooms connected.
+    row_bounds = [0] + wall_rows + [height - 1]
+    col_bounds = [0] + wall_cols + [width - 1]
+    for top, bottom in zip(row_bounds, row_bounds[1:]):
+        for col in wall_cols:
+            grid.carve(rng.randrange(top + 1, bottom), col)
+    for left, right in zip(col_bounds, col_bounds[1:]):
+        for row in wall_rows:
+            grid.carve(row, rng.randrange(left + 1, right))
+    return grid.lines()
+
+
+GENERATORS = {
+    "backtracker": backtracker,
+    "prim": prim,
+    "rooms": rooms,
+}
+
+
+def generate(kind, width, height, seed=None):
+    """
+    Returns the lines of a new maze of the given size.
+    """
+    return GENERATORS[kind](width, height, random.Random(seed))
+
+
+def write_maze(filename, lines):
+    with open(filename, "w") as f:
+        f.write("\n".join(lines))
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("kind", choices=sorted(GENERATORS))
+    parser.add_argument("width", type=int)
+    parser.add_argument("height", type=int)
+    parser.add_argument("output")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    write_maze(args.output, generate(args.kind, args.width, args.height, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+from .maze_cache import solve_cached
+from .maze_solver import Maze
+
+def solve_greedy(filename, text_format="full"):
+    return solve_cached(filename, "greedy", Maze.solve_greedy, text_format)
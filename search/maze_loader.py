@@ -0,0 +1,223 @@
+import mmap
+import os
+import struct
+
+import numpy as np
+
+SPACE = ord(" ")
+START = ord("A")
+GOAL = ord("B")
+NEWLINE = ord("\n")
+CARRIAGE_RETURN = ord("\r")
+
+# Bytes other than "\n" that str.splitlines() treats as line breaks.
+# Files containing them, or any non-ASCII byte, take the text path so
+# that rows and columns match Python's own line and character split.
+OTHER_LINE_BREAKS = b"\x0b\x0c\x1c\x1d\x1e"
+
+
+# Packed binary mazes: a fixed header followed by one bit per cell in
+# row-major order, least significant bit first, 1 for a wall.
+BINARY_SUFFIX = ".mazeb"
+BINARY_MAGIC = b"MAZB"
+BINARY_VERSION = 1
+# magic, version, reserved, width, height, start row/col, goal row/col
+BINARY_HEADER = struct.Struct("<4sHH6I")
+
+
+class MazeFormatError(Exception):
+    pass
+
+
+def read_maze_file(filename):
+    """
+    Loads a text or packed binary maze, chosen by file suffix, and
+    returns (height, width, walls, start, goal).
+    """
+    if filename.endswith(BINARY_SUFFIX):
+        return load_binary_file(filename)
+    return load_maze_file(filename)
+
+
+def binary_path(filename):
+    return os.path.splitext(filename)[0] + BINARY_SUFFIX
+
+
+def preferred_path(filename):
+    """
+    Returns the packed binary version of a text maze when one exists
+    and is not older than the text file, otherwise filename itself.
+    """
+    packed = binary_path(filename)
+    if packed == filename:
+        return filename
+    try:
+        packed_mtime = os.stat(packed).st_mtime_ns
+    except FileNotFoundError:
+        return filename
+    try:
+        if os.stat(filename).st_mtime_ns > packed_mtime:
+            return filename
+    except FileNotFoundError:
+        pass
+    return packed
+
+
+def load_binary_file(filename):
+    """
+    Loads a packed binary maze. The bit array is read in place from a
+    memory map and expanded into the walls bytearray in one vectorized
+    step.
+    """
+    with open(filename, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise MazeFormatError("Empty binary maze file.")
+
+    if len(mm) < BINARY_HEADER.size:
+        raise MazeFormatError("Truncated binary maze header.")
+    (magic, version, _, width, height,
+     start_row, start_col, goal_row, goal_col) = BINARY_HEADER.unpack_from(mm)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise MazeFormatError("Not a binary maze file.")
+
+    cells = width * height
+    packed_size = (cells + 7) // 8
+    if len(mm) < BINARY_HEADER.size + packed_size:
+        raise MazeFormatError("Truncated binary maze data.")
+    start = (start_row, start_col)
+    goal = (goal_row, goal_col)
+    if not (start_row < height and start_col < width
+            and goal_row < height and goal_col < width):
+        raise MazeFormatError("Start or goal is outside the maze.")
+
+    bits = np.frombuffer(mm, dtype=np.uint8, count=packed_size,
+                         offset=BINARY_HEADER.size)
+    walls = bytearray(cells)
+    np.frombuffer(walls, dtype=np.uint8)[:] = np.unpackbits(
+        bits, count=cells, bitorder="little"
+    )
+    return height, width, walls, start, goal
+
+
+def pack_walls(width, height, walls, start, goal):
+    """
+    Returns the packed binary encoding of a maze.
+    """
+    header = BINARY_HEADER.pack(
+        BINARY_MAGIC, BINARY_VERSION, 0, width, height, *start, *goal
+    )
+    bits = np.packbits(np.frombuffer(walls, dtype=np.uint8), bitorder="little")
+    return header + bits.tobytes()
+
+
+def load_maze_file(filename):
+    """
+    Loads a text maze and returns (height, width, walls, start, goal).
+
+    walls is a bytearray of height * width cells indexed by
+    row * width + col, with 1 for a wall and 0 for an open cell. Short
+    lines are padded with open cells. start and goal are (row, col).
+
+    ASCII files are memory-mapped and each row is converted with a
+    vectorized byte comparison, so loading is bound by I/O rather than
+    by the interpreter.
+    """
+    with open(filename, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            raise MazeFormatError(
+                "Maze must have exactly one start point and one goal."
+            )
+
+    # The map is released once the last array viewing it is freed.
+    data = np.frombuffer(mm, dtype=np.uint8)
+    if needs_text_path(data):
+        return parse_text(mm[:].decode())
+    return parse_bytes(data)
+
+
+def needs_text_path(data):
+    if np.any(data >= 0x80):
+        return True
+    for byte in OTHER_LINE_BREAKS:
+        if np.any(data == byte):
+            return True
+    carriage_returns = np.flatnonzero(data == CARRIAGE_RETURN)
+    if len(carriage_returns) == 0:
+        return False
+    # Only "\r\n" endings are handled on the byte path.
+    followers = carriage_returns + 1
+    if followers[-1] >= len(data):
+        return True
+    return not np.all(data[followers] == NEWLINE)
+
+
+def parse_bytes(data):
+    starts_at = np.flatnonzero(data == START)
+    goals_at = np.flatnonzero(data == GOAL)
+    if len(starts_at) != 1 or len(goals_at) != 1:
+        raise MazeFormatError(
+            "Maze must have exactly one start point and one goal."
+        )
+
+    newlines = np.flatnonzero(data == NEWLINE)
+    line_starts = np.concatenate(([0], newlines + 1))
+    line_ends = np.concatenate((newlines, [len(data)]))
+    if line_starts[-1] == len(data):
+        # A trailing newline does not start another row.
+        line_starts = line_starts[:-1]
+        line_ends = line_ends[:-1]
+    crlf = (line_ends > line_starts) & (
+        data[np.maximum(line_ends - 1, 0)] == CARRIAGE_RETURN
+    )
+    line_ends = line_ends - crlf
+
+    height = len(line_starts)
+    width = int((line_ends - line_starts).max())
+    walls = bytearray(height * width)
+    grid = np.frombuffer(walls, dtype=np.uint8)
+    for i in range(height):
+        row = data[line_starts[i]:line_ends[i]]
+        offset = i * width
+        grid[offset:offset + len(row)] = (
+            (row != SPACE) & (row != START) & (row != GOAL)
+        )
+    del grid
+
+    return height, width, walls, locate(starts_at[0], line_starts), \
+        locate(goals_at[0], line_starts)
+
+
+def locate(position, line_starts):
+    row = int(np.searchsorted(line_starts, position, side="right")) - 1
+    return row, int(position - line_starts[row])
+
+
+def parse_text(contents):
+    """
+    Character-by-character parser used for files the byte path cannot
+    handle.
+    """
+    if contents.count("A") != 1 or contents.count("B") != 1:
+        raise MazeFormatError(
+            "Maze must have exactly one start point and one goal."
+        )
+
+    contents = contents.splitlines()
+    height = len(contents)
+    width = max(len(line) for line in contents)
+    walls = bytearray(height * width)
+    for i, line in enumerate(contents):
+        offset = i * width
+        walls[offset:offset + len(line)] = bytes(
+            ch not in " AB" for ch in line
+        )
+        if "A" in line:
+            start = (i, line.index("A"))
+        if "B" in line:
+            goal = (i, line.index("B"))
+    return height, width, walls, start, goal
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+OUTPUT_DIR = "static"
+OUTPUT_PREFIX = "solve_"
+MAX_OUTPUT_FILES = 256
+MAX_OUTPUT_AGE_SECONDS = 60 * 60
+GC_INTERVAL_SECONDS = 30
+
+gc_lock = threading.Lock()
+last_gc = 0.0
+
+
+def save_image(png, directory=OUTPUT_DIR):
+    """
+    Writes PNG bytes to a file named after their SHA-256 and returns the
+    URL path under /static.
+
+    Identical images share one file, and different solves never write
+    to the same path, so concurrent workers cannot clobber each other.
+    The file is written to a temporary name and renamed into place.
+    """
+    digest = hashlib.sha256(png).hexdigest()[:32]
+    filename = f"{OUTPUT_PREFIX}{digest}.png"
+    path = os.path.join(directory, filename)
+
+    try:
+        # Refresh the age so collect_garbage keeps images still in use.
+        os.utime(path)
+    except FileNotFoundError:
+        # New, or removed by collect_garbage since it was last written.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(png)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    maybe_collect_garbage(directory)
+    return f"/static/{filename}"
+
+
+def maybe_collect_garbage(directory=OUTPUT_DIR):
+    global last_gc
+
+    now = time.time()
+    with gc_lock:
+        if now - last_gc < GC_INTERVAL_SECONDS:
+            return
+        last_gc = now
+    collect_garbage(directory)
+
+
+def collect_garbage(directory=OUTPUT_DIR, max_files=MAX_OUTPUT_FILES,
+                    max_age=MAX_OUTPUT_AGE_SECONDS):
+    """
+    Deletes solve images older than max_age seconds, then the oldest
+    remaining ones until at most max_files are left. Temporary files
+    older than max_age, left behind by writers that died mid-write,
+    are deleted too. Returns the number of files removed.
+    """
+    now = time.time()
+    files = []
+    stale = []
+    for entry in os.scandir(directory):
+        is_image = entry.name.startswith(OUTPUT_PREFIX) and entry.name.endswith(".png")
+        if not is_image and not entry.name.endswith(".tmp"):
+            continue
+        try:
+            mtime = entry.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        if is_image:
+            files.append((mtime, entry.path))
+        elif now - mtime > max_age:
+            stale.append(entry.path)
+    files.sort(reverse=True)
+
+    removed = 0
+    for path in stale:
+        try:
+            os.unlink(path)
+            removed += 1
+        except FileNotFoundError:
+            # Renamed into place or removed by another worker.
+            pass
+    for position, (mtime, path) in enumerate(files):
+        if position < max_files and now - mtime <= max_age:
+            continue
+        try:
+            os.unlink(path)
+            removed += 1
+        except FileNotFoundError:
+            # Another worker got there first.
+            pass
+    return removed
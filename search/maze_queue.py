@@ -1,11 +1,5 @@
+from .maze_cache import solve_cached
 from .maze_solver import Maze
 
-def solve_queue(filename):
-    m = Maze(filename, use_stack=False)
-    m.solve()
-    m.output_image("static/maze.png", show_explored=True)
-    return {
-        "states_explored": m.num_explored,
-        "text": m.as_text(),
-        "image": "/static/maze.png"
-    }
+def solve_queue(filename, text_format="full"):
+    return solve_cached(filename, "queue", Maze.solve_queue, text_format)
@@ -1,20 +1,65 @@
-from PIL import Image, ImageDraw
+import copy
+import heapq
+import io
+from array import array
+from collections import deque
+from functools import lru_cache
 
-class Node():
-    def __init__(self, state, parent, action):
-        self.state = state
-        self.parent = parent
-        self.action = action
+import numpy as np
+from PIL import Image
+
+from .maze_loader import read_maze_file
+
+EMPTY_CELL = 0
+WALL_CELL = 1
+START_CELL = 2
+GOAL_CELL = 3
+SOLUTION_CELL = 4
+EXPLORED_CELL = 5
+
+CELL_COLORS = np.array([
+    (237, 240, 252, 255),
+    (40, 40, 40, 255),
+    (255, 0, 0, 255),
+    (0, 171, 28, 255),
+    (220, 235, 113, 255),
+    (212, 97, 85, 255),
+], dtype=np.uint8)
+
+# Text for each cell code; explored cells print as open space. The
+# extra entry is the row separator used by as_text_rle.
+TEXT_CHARS = (" ", "█", "A", "B", "*", " ", "\n")
+TEXT_CODEPOINTS = np.array([ord(ch) for ch in TEXT_CHARS], dtype="<u4")
+NEWLINE_CODE = len(TEXT_CHARS) - 1
+TEXT_FORMATS = ("full", "rle", "none")
+
+# Largest image output_image will render, in pixels. Rendering needs
+# roughly ten bytes per pixel at its peak.
+MAX_IMAGE_PIXELS = 1 << 27
+
+
+@lru_cache(maxsize=8)
+def tile_mask(cell_size, cell_border):
+    """
+    Returns a boolean (cell_size, cell_size) mask that is True inside a
+    cell and False on its border.
+    """
+    mask = np.zeros((cell_size, cell_size), dtype=bool)
+    inner = slice(cell_border, cell_size - cell_border + 1)
+    mask[inner, inner] = True
+    return mask
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        self.states = set()
 
-    def add(self, node):
-        self.frontier.append(node)
+    def add(self, state):
+        self.frontier.append(state)
+        self.states.add(state)
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,52 +67,127 @@ class StackFrontier():
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
-        node = self.frontier[-1]
-        self.frontier = self.frontier[:-1]
-        return node
+        state = self.frontier.pop()
+        self.states.discard(state)
+        return state
 
 class QueueFrontier(StackFrontier):
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
-        node = self.frontier[0]
-        self.frontier = self.frontier[1:]
-        return node
+        state = self.frontier.popleft()
+        self.states.discard(state)
+        return state
 
 class Maze():
+    """
+    Maze grid stored as flat arrays indexed by ``row * width + col``.
+
+    ``walls`` is a bytearray with 1 for a wall and 0 for an open cell.
+    Search state (parents and explored flags) is kept in flat arrays
+    of the same size instead of per-cell objects.
+    """
+
     def __init__(self, filename, use_stack=True):
-        with open(filename) as f:
-            contents = f.read()
-
-        if contents.count("A") != 1 or contents.count("B") != 1:
-            raise Exception("Maze must have exactly one start point and one goal.")
-
-        contents = contents.splitlines()
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents)
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
+        (self.height, self.width, self.walls,
+         self.start, self.goal) = read_maze_file(filename)
 
         self.solution = None
-        self.explored = set()
+        self.explored = bytearray(self.height * self.width)
         self.num_explored = 0
         self.use_stack = use_stack
+        # Copies share walls until one of them is edited.
+        self.owns_walls = True
+        # Optional search.maze_field.DistanceField kept up to date by
+        # set_wall; see attach_field.
+        self.field = None
+
+    def copy(self):
+        """
+        Returns a maze that shares this maze's walls but has fresh
+        search state, so a parsed maze can be solved more than once.
+        """
+        maze = copy.copy(self)
+        maze.solution = None
+        maze.explored = bytearray(len(self.walls))
+        maze.num_explored = 0
+        # Neither side may now edit the shared walls in place.
+        self.owns_walls = False
+        maze.owns_walls = False
+        maze.field = self.field.copy() if self.field is not None else None
+        return maze
+
+    def index(self, state):
+        row, col = state
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise ValueError(f"Cell {tuple(state)} is outside the maze.")
+        return row * self.width + col
+
+    def state(self, index):
+        return divmod(index, self.width)
+
+    def is_wall(self, state):
+        return bool(self.walls[self.index(state)])
+
+    def set_wall(self, state, wall=True):
+        """
+        Adds or removes the wall at state. Returns False if the cell
+        already had that value.
+
+        If a distance field is attached, only the region affected by
+        the edit is repaired, and solve_field then reads the new path
+        from it.
+        """
+        # Compare flat indices, so lists and numpy pairs match too.
+        index = self.index(state)
+        if index in (self.index(self.start), self.index(self.goal)):
+            raise ValueError("Cannot place a wall on the start or goal.")
+        if bool(self.walls[index]) == wall:
+            return False
+
+        if not self.owns_walls:
+            self.walls = bytearray(self.walls)
+            self.owns_walls = True
+        self.walls[index] = 1 if wall else 0
+        self.solution = None
+
+        if self.field is not None:
+            self.field.update(self, index)
+        return True
+
+    def attach_field(self, field=None):
+        """
+        Attaches a distance field for set_wall to keep up to date and
+        returns it. With no field, one is built from the current walls,
+        which also refreshes a field that has gone stale. A given field
+        (for example a shared one from maze_field.load_field) is
+        copied, so later edits do not change it.
+        """
+        from .maze_field import DistanceField
+
+        if field is None:
+            field = DistanceField.build(self)
+        else:
+            if (field.width, field.height) != (self.width, self.height):
+                raise ValueError("Distance field does not fit the maze.")
+            field = field.copy()
+        self.field = field
+        return field
+
+    def add_wall(self, state):
+        return self.set_wall(state, True)
+
+    def remove_wall(self, state):
+        return self.set_wall(state, False)
+
+    def solve_field(self):
+        """
+        Sets the solution from the attached distance field instead of
+        searching.
+        """
+        if self.field is None:
+            raise Exception("no distance field attached")
+        self.solution = self.field.path_from(self.start)
 
     def neighbors(self, state):
         row, col = state
@@ -79,12 +199,72 @@ class Maze():
         ]
         result = []
         for action, (r, c) in candidates:
-            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r][c]:
+            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r * self.width + c]:
                 result.append((action, (r, c)))
         return result
 
+    def neighbor_indices(self, index):
+        """
+        Returns open neighbour indices of a flat cell index, in the same
+        up/down/left/right order as ``neighbors``.
+        """
+        width = self.width
+        walls = self.walls
+        col = index % width
+        result = []
+        up = index - width
+        if up >= 0 and not walls[up]:
+            result.append(up)
+        down = index + width
+        if down < len(walls) and not walls[down]:
+            result.append(down)
+        if col > 0 and not walls[index - 1]:
+            result.append(index - 1)
+        if col < width - 1 and not walls[index + 1]:
+            result.append(index + 1)
+        return result
+
+    def action(self, parent, child):
+        """
+        Returns the action that moves from flat index parent to child.
+        """
+        delta = child - parent
+        if delta == -self.width:
+            return "up"
+        if delta == self.width:
+            return "down"
+        if delta == -1:
+            return "left"
+        return "right"
+
+    def trace_path(self, parents, index):
+        """
+        Follows parent pointers back from index to the start and returns
+        the solution as (actions, cells).
+        """
+        actions, cells = [], []
+        while parents[index] != -1:
+            parent = parents[index]
+            actions.append(self.action(parent, index))
+            cells.append(self.state(index))
+            index = parent
+        actions.reverse()
+        cells.reverse()
+        return actions, cells
+
     def solve(self):
-        start = Node(self.start, None, None)
+        for _ in self.iter_solve():
+            pass
+
+    def iter_solve(self):
+        """
+        Generator form of solve: yields each flat cell index as it is
+        explored and sets self.solution once the goal is reached.
+        """
+        start = self.index(self.start)
+        goal = self.index(self.goal)
+        parents = array("i", [-1]) * len(self.walls)
+        explored = self.explored
         frontier = StackFrontier() if self.use_stack else QueueFrontier()
         frontier.add(start)
 
@@ -92,71 +272,271 @@ class Maze():
             if frontier.empty():
                 raise Exception("no solution")
 
-            node = frontier.remove()
+            index = frontier.remove()
             self.num_explored += 1
+            yield index
 
-            if node.state == self.goal:
-                actions, cells = [], []
-                while node.parent:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
-                actions.reverse()
-                cells.reverse()
-                self.solution = (actions, cells)
+            if index == goal:
+                self.solution = self.trace_path(parents, index)
                 return
 
-            self.explored.add(node.state)
-            for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state, node, action)
-                    frontier.add(child)
-
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        cell_size = 50
-        cell_border = 2
-        img = Image.new("RGBA", (self.width * cell_size, self.height * cell_size), "black")
-        draw = ImageDraw.Draw(img)
-
-        solution = self.solution[1] if self.solution else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-                if col:
-                    fill = (40, 40, 40)
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
-                elif solution and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
-                elif solution and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
-                else:
-                    fill = (237, 240, 252)
-
-                draw.rectangle(
-                    [(j * cell_size + cell_border, i * cell_size + cell_border),
-                     ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)],
-                    fill=fill
-                )
-
-        img.save(filename)
+            explored[index] = 1
+            for neighbor in self.neighbor_indices(index):
+                if not frontier.contains_state(neighbor) and not explored[neighbor]:
+                    parents[neighbor] = index
+                    frontier.add(neighbor)
+
+    def solve_stack(self):
+        self.use_stack = True
+        self.solve()
+
+    def solve_queue(self):
+        self.use_stack = False
+        self.solve()
+
+    def iter_search(self, algorithm):
+        """
+        Returns the generator for the named algorithm, one of
+        "stack", "queue", "astar", "greedy" or "bidirectional".
+        """
+        if algorithm in ("stack", "queue"):
+            self.use_stack = algorithm == "stack"
+            return self.iter_solve()
+        if algorithm == "astar":
+            return self.iter_best_first(greedy=False)
+        if algorithm == "greedy":
+            return self.iter_best_first(greedy=True)
+        if algorithm == "bidirectional":
+            return self.iter_bidirectional()
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+
+    def heuristic(self, index):
+        """
+        Manhattan distance from a flat cell index to the goal.
+        """
+        row, col = divmod(index, self.width)
+        return abs(row - self.goal[0]) + abs(col - self.goal[1])
+
+    def solve_best_first(self, greedy=False):
+        for _ in self.iter_best_first(greedy):
+            pass
+
+    def iter_best_first(self, greedy=False):
+        """
+        Heap-based best-first search using the Manhattan heuristic,
+        yielding each flat cell index as it is explored.
+
+        With greedy=False this is A* and finds a shortest path; with
+        greedy=True cells are ordered by the heuristic alone.
+        """
+        start = self.index(self.start)
+        goal = self.index(self.goal)
+        parents = array("i", [-1]) * len(self.walls)
+        costs = array("i", [-1]) * len(self.walls)
+        explored = self.explored
+        costs[start] = 0
+        counter = 0
+        heap = [(self.heuristic(start), counter, start)]
+
+        while heap:
+            _, _, index = heapq.heappop(heap)
+            if explored[index]:
+                continue
+            self.num_explored += 1
+            yield index
+
+            if index == goal:
+                self.solution = self.trace_path(parents, index)
+                return
+
+            explored[index] = 1
+            cost = costs[index] + 1
+            for neighbor in self.neighbor_indices(index):
+                if explored[neighbor]:
+                    continue
+                if costs[neighbor] != -1 and (greedy or costs[neighbor] <= cost):
+                    continue
+                costs[neighbor] = cost
+                parents[neighbor] = index
+                priority = self.heuristic(neighbor)
+                if not greedy:
+                    priority += cost
+                counter += 1
+                heapq.heappush(heap, (priority, counter, neighbor))
+
+        raise Exception("no solution")
+
+    def solve_astar(self):
+        self.solve_best_first(greedy=False)
+
+    def solve_greedy(self):
+        self.solve_best_first(greedy=True)
+
+    def solve_bidirectional(self):
+        for _ in self.iter_bidirectional():
+            pass
+
+    def iter_bidirectional(self):
+        """
+        Breadth-first search from both the start and the goal, one level
+        at a time from the smaller side, until the two searches meet.
+        Yields each flat cell index as it is explored.
+        """
+        start = self.index(self.start)
+        goal = self.index(self.goal)
+        size = len(self.walls)
+        # Forward cells point back towards the start, backward cells
+        # point on towards the goal.
+        parents = array("i", [-1]) * size
+        distances = array("i", [0]) * size
+        sides = bytearray(size)
+        sides[start] = 1
+        sides[goal] = 2
+        frontiers = {1: [start], 2: [goal]}
+        explored = self.explored
+
+        while frontiers[1] and frontiers[2]:
+            side = 1 if len(frontiers[1]) <= len(frontiers[2]) else 2
+            other = 3 - side
+            best = None
+            next_level = []
+            for index in frontiers[side]:
+                self.num_explored += 1
+                explored[index] = 1
+                yield index
+                for neighbor in self.neighbor_indices(index):
+                    if sides[neighbor] == other:
+                        length = distances[index] + 1 + distances[neighbor]
+                        if best is None or length < best[0]:
+                            best = (length, index, neighbor)
+                    elif not sides[neighbor]:
+                        sides[neighbor] = side
+                        parents[neighbor] = index
+                        distances[neighbor] = distances[index] + 1
+                        next_level.append(neighbor)
+
+            if best is not None:
+                _, index, neighbor = best
+                if side == 2:
+                    index, neighbor = neighbor, index
+                self.solution = self.join_paths(parents, index, neighbor)
+                return
+            frontiers[side] = next_level
+
+        raise Exception("no solution")
+
+    def join_paths(self, parents, forward, backward):
+        """
+        Joins the forward tree path ending at forward with the backward
+        tree path starting at backward into a single (actions, cells).
+        """
+        actions, cells = self.trace_path(parents, forward)
+        previous = forward
+        index = backward
+        while index != -1:
+            actions.append(self.action(previous, index))
+            cells.append(self.state(index))
+            previous = index
+            index = parents[index]
+        return actions, cells
+
+    def cell_codes(self, show_solution=True, show_explored=False):
+        """
+        Returns a (height, width) uint8 array with one *_CELL code per
+        cell, shared by the image and text renderers.
+        """
+        # Later codes win.
+        cells = np.full((self.height, self.width), EMPTY_CELL, dtype=np.uint8)
+        if self.solution and show_explored:
+            explored = np.frombuffer(self.explored, dtype=np.uint8)
+            cells[explored.reshape(self.height, self.width) != 0] = EXPLORED_CELL
+        if self.solution and show_solution and self.solution[1]:
+            rows, cols = zip(*self.solution[1])
+            cells[rows, cols] = SOLUTION_CELL
+        cells[self.goal] = GOAL_CELL
+        cells[self.start] = START_CELL
+        walls = np.frombuffer(self.walls, dtype=np.uint8)
+        cells[walls.reshape(self.height, self.width) != 0] = WALL_CELL
+        return cells
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     cell_size=50, cell_border=2):
+        size = (self.width * cell_size, self.height * cell_size)
+        if size[0] * size[1] > MAX_IMAGE_PIXELS:
+            raise ValueError(
+                f"Maze is too large to render ({size[0]}x{size[1]} pixels)."
+            )
+
+        cells = self.cell_codes(show_solution, show_explored)
+        colors = Image.fromarray(CELL_COLORS[cells], "RGBA")
+        colors = colors.resize(size, Image.NEAREST)
+        mask = np.tile(tile_mask(cell_size, cell_border), (self.height, self.width))
+
+        img = Image.new("RGBA", size, "black")
+        img.paste(colors, mask=Image.fromarray(mask))
+        img.save(filename, format="PNG")
+
+    def image_bytes(self, **kwargs):
+        """
+        Renders the maze like output_image and returns the PNG bytes.
+        """
+        buffer = io.BytesIO()
+        self.output_image(buffer, **kwargs)
+        return buffer.getvalue()
 
     def as_text(self):
-        solution = self.solution[1] if self.solution else None
-        lines = []
-        for i, row in enumerate(self.walls):
-            line = ""
-            for j, col in enumerate(row):
-                if col:
-                    line += "█"
-                elif (i, j) == self.start:
-                    line += "A"
-                elif (i, j) == self.goal:
-                    line += "B"
-                elif solution and (i, j) in solution:
-                    line += "*"
-                else:
-                    line += " "
-            lines.append(line)
-        return "\n".join(lines)
+        # One UTF-32 code point per cell plus a newline column, decoded
+        # into a single string in one step.
+        cells = self.cell_codes(show_solution=True)
+        chars = np.empty((self.height, self.width + 1), dtype="<u4")
+        chars[:, :-1] = TEXT_CODEPOINTS[cells]
+        chars[:, -1] = ord("\n")
+        return chars.tobytes()[:-4].decode("utf-32-le")
+
+    def iter_text_rows(self, chunk_rows=256):
+        """
+        Yields the lines of as_text one at a time, converting chunk_rows
+        rows at once so the whole text is never held in memory.
+        """
+        cells = self.cell_codes(show_solution=True)
+        width = self.width
+        for top in range(0, self.height, chunk_rows):
+            chunk = TEXT_CODEPOINTS[cells[top:top + chunk_rows]]
+            text = chunk.astype("<u4").tobytes().decode("utf-32-le")
+            for offset in range(0, len(text), width):
+                yield text[offset:offset + width]
+
+    def as_text_rle(self):
+        """
+        Run-length encoded as_text. Every run of a repeated character
+        is written as its count followed by the character, with the
+        count left out for single characters, so "███  B" becomes
+        "3█2 B". Rows are separated by newlines. Maze text never
+        contains digits, so the encoding is unambiguous.
+        """
+        cells = self.cell_codes(show_solution=True)
+        rows = np.empty((self.height, self.width + 1), dtype=np.uint8)
+        rows[:, :-1] = cells
+        rows[:, -1] = NEWLINE_CODE
+        flat = rows.ravel()[:-1]
+
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(flat)) + 1))
+        lengths = np.diff(np.append(starts, len(flat)))
+        parts = []
+        for code, length in zip(flat[starts].tolist(), lengths.tolist()):
+            char = TEXT_CHARS[code]
+            parts.append(char if length == 1 else f"{length}{char}")
+        return "".join(parts)
+
+    def format_text(self, text_format="full"):
+        """
+        Returns the solved maze as text in one of TEXT_FORMATS:
+        "full" (as_text), "rle" (as_text_rle) or "none" (None).
+        """
+        if text_format == "full":
+            return self.as_text()
+        if text_format == "rle":
+            return self.as_text_rle()
+        if text_format == "none":
+            return None
+        raise ValueError(f"Unknown text format: {text_format}")
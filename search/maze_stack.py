@@ -1,11 +1,5 @@
+from .maze_cache import solve_cached
 from .maze_solver import Maze
 
-def solve_stack(filename):
-    m = Maze(filename, use_stack=True)
-    m.solve()
-    m.output_image("static/maze.png", show_explored=True)
-    return {
-        "states_explored": m.num_explored,
-        "text": m.as_text(),
-        "image": "/static/maze.png"
-    }
+def solve_stack(filename, text_format="full"):
+    return solve_cached(filename, "stack", Maze.solve_stack, text_format)
@@ -0,0 +1,103 @@
+import json
+import os
+import sys
+from array import array
+
+from .maze_cache import load_maze
+from .maze_executor import send_frame
+
+STREAM_BATCH_SIZE = 512
+MAX_STREAM_BATCH_SIZE = 65536
+# Largest maze, in cells, that /ws/solve will stream.
+MAX_STREAM_CELLS = int(os.environ.get("MAZE_STREAM_MAX_CELLS", str(1 << 20)))
+
+
+def stream_job(job, filename, algorithm, batch_size=STREAM_BATCH_SIZE,
+               binary=False):
+    """
+    Worker-side stream job for SolverPool.stream: sends the frames of
+    stream_frames, then None.
+    """
+    for frame in stream_frames(filename, algorithm, batch_size, binary):
+        send_frame(job, frame)
+    send_frame(job, None)
+
+
+def stream_frames(filename, algorithm, batch_size=STREAM_BATCH_SIZE,
+                  binary=False):
+    """
+    Solves filename with algorithm and yields WebSocket frames as the
+    search runs.
+
+    Frames, in order:
+
+        {"type": "maze", "width", "height", "start", "goal"}
+        explored batches, as {"type": "explored", "cells": [...]}
+            or, when binary is True, raw little-endian uint32 arrays
+        {"type": "solution", "states_explored", "actions", "cells"}
+
+    Cells are flat indices (row * width + col). If the search fails, for
+    example because there is no path, the last frame is
+    {"type": "error", "error": ...}. A maze of more than MAX_STREAM_CELLS
+    cells gets only that error frame.
+    JSON frames are yielded as str and binary frames as bytes.
+    """
+    maze = load_maze(filename)
+    if maze.width * maze.height > MAX_STREAM_CELLS:
+        yield json.dumps({
+            "type": "error",
+            "error": f"Maze is too large to stream (over {MAX_STREAM_CELLS} cells).",
+        })
+        return
+
+    m = maze.copy()
+    search = m.iter_search(algorithm)
+
+    yield json.dumps({
+        "type": "maze",
+        "width": m.width,
+        "height": m.height,
+        "start": m.index(m.start),
+        "goal": m.index(m.goal),
+    })
+
+    batch = array("I")
+    try:
+        for index in search:
+            batch.append(index)
+            if len(batch) >= batch_size:
+                yield explored_frame(batch, binary)
+                batch = array("I")
+    except Exception as e:
+        error = str(e)
+    else:
+        error = None
+
+    if batch:
+        yield explored_frame(batch, binary)
+
+    if error is not None:
+        yield json.dumps({
+            "type": "error",
+            "error": error,
+        })
+        return
+
+    actions, cells = m.solution
+    yield json.dumps({
+        "type": "solution",
+        "states_explored": m.num_explored,
+        "actions": actions,
+        "cells": [m.index(cell) for cell in cells],
+    })
+
+
+def explored_frame(batch, binary):
+    if binary:
+        if sys.byteorder == "big":
+            batch.byteswap()
+        return batch.tobytes()
+    return json.dumps({
+        "type": "explored",
+        "cells": batch.tolist(),
+    })
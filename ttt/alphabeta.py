@@ -0,0 +1,232 @@
+"""
+Alpha-beta search core shared by the tic-tac-toe engines.
+
+The search is written against a small game interface, so the same
+code drives the exact 3x3 solver and depth-limited search on larger
+boards. A game object provides:
+
+    to_move(state)        1 if the maximising player (X) moves, else -1
+    moves(state)          legal moves in natural (row-major) order
+    play(state, move)     the state after move
+    outcome(state)        None while the game continues, else the
+                          final score for X
+    evaluate(state)       heuristic score for X at the depth limit
+    key(state)            transposition-table key; it must include
+                          the side to move
+    move_priority(move)   static ordering rank, lower is tried first
+    win_score             smallest score of a won position; finding
+                          one ends the search of that node early
+    tt_move_hints         whether moves stored in the table can be
+                          reused for ordering (False when keys fold
+                          symmetric positions together)
+
+All scores must be integers, and every win must score above every
+heuristic value.
+"""
+
+import time
+
+INFINITY = float("inf")
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# How many nodes to search between deadline checks.
+DEADLINE_CHECK_NODES = 1024
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside a search when its deadline passes.
+    """
+
+
+class AlphaBeta():
+    """
+    Negamax alpha-beta with a transposition table and killer moves.
+
+    Moves are ordered by the table's best move, then the killer moves
+    of the current ply, then the game's static priority. best_move
+    breaks ties the way plain minimax does, by natural move order, so
+    it returns the same move as an exhaustive search.
+
+    An instance holds the state of one search (killer moves, deadline
+    and node count) and must not be shared between threads. Searches
+    that should reuse each other's work share the table instead, with
+    a new AlphaBeta each.
+    """
+
+    def __init__(self, game, table=None, killers_per_ply=2):
+        self.game = game
+        self.table = {} if table is None else table
+        self.killers_per_ply = killers_per_ply
+        self.killers = {}
+        self.nodes = 0
+        # time.monotonic() value after which search raises
+        # SearchTimeout, or None for no limit.
+        self.deadline = None
+
+    def ordered_moves(self, state, ply, hint):
+        game = self.game
+        killers = self.killers.get(ply, ())
+
+        def rank(move):
+            if move == hint:
+                return (0, 0)
+            if move in killers:
+                return (1, killers.index(move))
+            return (2, game.move_priority(move))
+
+        return sorted(game.moves(state), key=rank)
+
+    def add_killer(self, ply, move):
+        killers = self.killers.setdefault(ply, [])
+        if move in killers:
+            return
+        killers.insert(0, move)
+        del killers[self.killers_per_ply:]
+
+    def search(self, state, depth, alpha, beta, ply=0):
+        """
+        Returns the negamax value of state for the side to move.
+        """
+        self.nodes += 1
+        if (
+            self.deadline is not None
+            and self.nodes % DEADLINE_CHECK_NODES == 0
+            and time.monotonic() >= self.deadline
+        ):
+            raise SearchTimeout()
+        game = self.game
+        color = game.to_move(state)
+
+        outcome = game.outcome(state)
+        if outcome is not None:
+            return color * outcome
+        if depth <= 0:
+            return color * game.evaluate(state)
+
+        key = game.key(state)
+        hint = None
+        entry = self.table.get(key)
+        if entry is not None:
+            entry_depth, value, flag, hint = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value > alpha:
+                    alpha = value
+                elif flag == UPPER and value < beta:
+                    beta = value
+                if alpha >= beta:
+                    return value
+
+        original_alpha = alpha
+        best = -INFINITY
+        best_move = None
+        forced_win = False
+        for move in self.ordered_moves(state, ply, hint):
+            value = -self.search(game.play(state, move), depth - 1, -beta, -alpha, ply + 1)
+            if value > best:
+                best, best_move = value, move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                self.add_killer(ply, move)
+                break
+            if best >= game.win_score:
+                # A forced win; the remaining moves cannot matter.
+                forced_win = True
+                break
+
+        if best <= original_alpha:
+            flag = UPPER
+        elif best >= beta or forced_win:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (
+            depth,
+            best,
+            flag,
+            best_move if game.tt_move_hints else None,
+        )
+        return best
+
+    def best_move(self, state, depth):
+        """
+        Returns (value, move) for the side to move, searching depth
+        plies. value is from the mover's point of view. Among equally
+        good moves the first in natural order is returned.
+        """
+        game = self.game
+        if game.outcome(state) is not None:
+            return None, None
+        moves = game.moves(state)
+        if not moves:
+            return None, None
+
+        self.killers = {}
+        natural = {move: position for position, move in enumerate(moves)}
+        entry = self.table.get(game.key(state))
+        hint = entry[3] if entry is not None else None
+
+        best_value = None
+        best = None
+        skipped = False
+        for move in self.ordered_moves(state, 0, hint):
+            child = game.play(state, move)
+            if best is None:
+                best_value = -self.search(child, depth - 1, -INFINITY, INFINITY, 1)
+                best = move
+                continue
+
+            earlier = natural[move] < natural[best]
+            if best_value >= game.win_score and not earlier:
+                skipped = True
+                continue
+            # An earlier move only needs to tie; a later one must win
+            # outright. Scores are integers, so "tie or better" is
+            # "better than best_value - 1".
+            alpha = best_value - 1 if earlier else best_value
+            value = -self.search(child, depth - 1, -INFINITY, -alpha, 1)
+            if value > alpha:
+                best_value, best = value, move
+
+        self.table[game.key(state)] = (
+            depth,
+            best_value,
+            LOWER if skipped else EXACT,
+            best if game.tt_move_hints else None,
+        )
+        return best_value, best
+
+    def iterative_deepening(self, state, max_depth, time_budget=None):
+        """
+        Searches depth 1, 2, ... up to max_depth, returning
+        (value, move, depth) from the deepest search that finished
+        within time_budget seconds. Each pass seeds the move ordering
+        of the next through the transposition table. Depth 1 always
+        runs to completion so there is a move to return.
+        """
+        start = time.monotonic()
+        value, move = self.best_move(state, 1)
+        completed = 1
+        if move is None:
+            return value, move, completed
+
+        try:
+            for depth in range(2, max_depth + 1):
+                if abs(value) >= self.game.win_score:
+                    # The game is decided within the searched horizon.
+                    break
+                if time_budget is not None:
+                    self.deadline = start + time_budget
+                value, move = self.best_move(state, depth)
+                completed = depth
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
+        return value, move, completed
@@ -0,0 +1,365 @@
+"""
+Benchmarks the tic-tac-toe engines by self-play and prints JSON lines.
+
+    python -m ttt.benchmark --games 20 --workers 4 --output bench.jsonl
+    python -m ttt.benchmark --rows 7 --cols 6 --k 4 --engines alphabeta mcts random
+
+Every pair of engines plays --games games per colour arrangement,
+spread over a process pool. The first --random-plies moves of each game
+are random so that deterministic engines do not replay one game.
+
+"bitboard" and "parallel" run the production search through the
+backend registry ("bitboard" is the "alphabeta" backend, i.e.
+game.best_move). "parallel" starts its own process pool in every
+benchmark worker, so it is best run with a small --workers.
+
+One record per pairing gives the results. One record per engine gives
+the moves it made, nodes searched (playouts for MCTS; not counted for
+bitboard, whose engines are internal to game.best_move), nodes per
+second, p50/p99 move latency and peak traced memory. On 3x3 boards it
+also gives the share of its moves that were optimal (game value) and
+the share that matched exhaustive minimax move for move. Memory is
+measured in a separate tracemalloc pass so that tracing does not
+distort the timings.
+"""
+
+import argparse
+import functools
+import itertools
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from . import mnk, ttt_logic
+from .alphabeta import AlphaBeta
+from .mcts import MCTS
+from .parallel import parallel_search
+
+ENGINES = ("minimax", "alphabeta", "bitboard", "parallel", "mcts", "random")
+
+# Engines that are production backends, and the registry name of each.
+BACKENDS = {
+    "bitboard": "alphabeta",
+    "parallel": "parallel",
+}
+
+# Exhaustive minimax visits every node of the game tree, so it only
+# runs on boards this small.
+MINIMAX_MAX_SQUARES = 9
+
+X = "X"
+O = "O"
+
+
+# ---------------------------------------------------------------------------
+# Players
+#
+# A player takes a state and returns (square, nodes searched), nodes
+# being None where the engine does not expose a count.
+# ---------------------------------------------------------------------------
+
+def plain_minimax(game, state):
+    """
+    Exhaustive minimax with no pruning, table or move ordering: the
+    baseline the other engines are measured against. Ties go to the
+    first square in natural order.
+    """
+    nodes = 0
+
+    def value(state):
+        nonlocal nodes
+        nodes += 1
+        outcome = game.outcome(state)
+        if outcome is not None:
+            return outcome
+        values = [value(game.play(state, move)) for move in game.moves(state)]
+        return max(values) if game.to_move(state) == 1 else min(values)
+
+    color = game.to_move(state)
+    best = best_value = None
+    for move in game.moves(state):
+        v = color * value(game.play(state, move))
+        if best_value is None or v > best_value:
+            best, best_value = move, v
+    return best, nodes
+
+
+def make_player(name, game, time_budget, playouts, seed):
+    if name == "minimax":
+        if game.rows * game.cols > MINIMAX_MAX_SQUARES:
+            raise ValueError(
+                f"minimax only runs on boards of up to {MINIMAX_MAX_SQUARES} squares."
+            )
+        return functools.partial(plain_minimax, game)
+
+    if name == "alphabeta":
+        # A fresh table per game, so only search within the game is
+        # measured.
+        engine = AlphaBeta(game)
+
+        def alphabeta(state):
+            before = engine.nodes
+            empty = game.rows * game.cols - bin(state[0] | state[1]).count("1")
+            if game is ttt_logic.game:
+                _, square = engine.best_move(state, empty)
+            else:
+                _, square, _ = engine.iterative_deepening(state, empty, time_budget)
+            return square, engine.nodes - before
+        return alphabeta
+
+    if name in BACKENDS:
+        # The production path, exactly as /ttt/move runs it.
+        search = ttt_logic.get_backend(BACKENDS[name])
+
+        def backend(state):
+            before = parallel_search.nodes
+            square = search(game, state, time_budget, playouts)
+            if name == "parallel":
+                return square, parallel_search.nodes - before
+            return square, None
+        return backend
+
+    if name == "mcts":
+        engine = MCTS(seed=seed)
+
+        def mcts(state):
+            before = engine.playouts
+            square = engine.best_move(game, state, time_budget, playouts)
+            return square, engine.playouts - before
+        return mcts
+
+    if name == "random":
+        rng = random.Random(seed)
+
+        def random_player(state):
+            return rng.choice(game.moves(state)), 0
+        return random_player
+
+    raise KeyError(name)
+
+
+# ---------------------------------------------------------------------------
+# Games (run in worker processes)
+# ---------------------------------------------------------------------------
+
+def play_game(shape, x_name, o_name, seed, random_plies, time_budget, playouts):
+    """
+    Plays one game and returns its record: the winner and, for every
+    engine move, (engine, token before the move, square, seconds,
+    nodes).
+    """
+    game = mnk.game_for(*shape)
+    players = {
+        X: make_player(x_name, game, time_budget, playouts, seed),
+        O: make_player(o_name, game, time_budget, playouts, seed + 1),
+    }
+    names = {X: x_name, O: o_name}
+    rng = random.Random(seed)
+    state = game.from_token(0)
+    moves = []
+
+    for ply in itertools.count():
+        if game.terminal(state):
+            break
+        mover = game.player(state)
+        if ply < random_plies:
+            square = rng.choice(game.moves(state))
+        else:
+            began = time.perf_counter()
+            square, nodes = players[mover](state)
+            seconds = time.perf_counter() - began
+            moves.append((names[mover], game.token(state), square, seconds, nodes))
+        state = game.place(state, square, mover)
+
+    return {
+        "x": x_name,
+        "o": o_name,
+        "winner": game.winner(state),
+        "moves": moves,
+    }
+
+
+def play_games(shape, x_name, o_name, seeds, random_plies, time_budget, playouts):
+    try:
+        return [
+            play_game(shape, x_name, o_name, seed, random_plies, time_budget, playouts)
+            for seed in seeds
+        ]
+    finally:
+        parallel_search.shutdown()
+
+
+def peak_memory(shape, name, seed, time_budget, playouts):
+    """
+    Peak traced bytes while name plays one game against random.
+    """
+    tracemalloc.start()
+    try:
+        play_game(shape, name, "random", seed, 0, time_budget, playouts)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        parallel_search.shutdown()
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def move_quality(token, square):
+    """
+    For a 3x3 move, returns (optimal, same_as_minimax): whether the
+    move keeps the game value, and whether it is the move exhaustive
+    minimax picks.
+    """
+    x, o = ttt_logic.decode_token(token)
+    mover = ttt_logic.bb_player(x, o)
+
+    def value(square):
+        child = ttt_logic.bb_result(x, o, square, mover)
+        engine = AlphaBeta(ttt_logic.game, ttt_logic.transposition_table)
+        return -engine.search(child, 9, -math.inf, math.inf)
+
+    best = ttt_logic.bb_minimax(x, o)
+    return value(square) == value(best), square == best
+
+
+def summarise(shape, names, games, memory):
+    """
+    Yields one record per pairing, then one per engine.
+    """
+    pairings = {}
+    per_engine = {name: [] for name in names}
+    for record in games:
+        key = (record["x"], record["o"])
+        tally = pairings.setdefault(key, {"games": 0, "x_wins": 0, "o_wins": 0, "draws": 0})
+        tally["games"] += 1
+        if record["winner"] == X:
+            tally["x_wins"] += 1
+        elif record["winner"] == O:
+            tally["o_wins"] += 1
+        else:
+            tally["draws"] += 1
+        for move in record["moves"]:
+            per_engine[move[0]].append(move)
+
+    rows, cols, k = shape
+    for (x_name, o_name), tally in pairings.items():
+        yield {"rows": rows, "cols": cols, "k": k, "x": x_name, "o": o_name, **tally}
+
+    for name in names:
+        moves = per_engine[name]
+        seconds = sum(move[3] for move in moves)
+        counted = [move[4] for move in moves if move[4] is not None]
+        nodes = sum(counted) if counted else None
+        latencies = sorted(move[3] for move in moves)
+        record = {
+            "rows": rows,
+            "cols": cols,
+            "k": k,
+            "engine": name,
+            "moves": len(moves),
+            "nodes": nodes,
+            "seconds": seconds,
+            "nodes_per_second": nodes / seconds if nodes is not None and seconds else None,
+            "p50_ms": None if not moves else percentile(latencies, 0.5) * 1000,
+            "p99_ms": None if not moves else percentile(latencies, 0.99) * 1000,
+        }
+        if shape == (3, 3, 3) and moves:
+            quality = [move_quality(move[1], move[2]) for move in moves]
+            record["optimal_rate"] = sum(q[0] for q in quality) / len(quality)
+            record["same_move_rate"] = sum(q[1] for q in quality) / len(quality)
+        if name in memory:
+            record["peak_bytes"] = memory[name]
+        yield record
+
+
+def benchmark(shape, names, games=10, workers=None, seed=0, random_plies=1,
+              time_budget=0.1, playouts=500, memory=True):
+    """
+    Plays every ordered pair of engines games times and yields the
+    summary records.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                play_games, shape, x_name, o_name,
+                [seed + 1000 * index + game for game in range(games)],
+                random_plies, time_budget, playouts,
+            )
+            for index, (x_name, o_name) in enumerate(itertools.product(names, repeat=2))
+        ]
+        memory_futures = {}
+        if memory:
+            memory_futures = {
+                name: executor.submit(peak_memory, shape, name, seed, time_budget, playouts)
+                for name in names
+            }
+        records = [record for future in futures for record in future.result()]
+        peaks = {name: future.result() for name, future in memory_futures.items()}
+
+    yield from summarise(shape, names, records, peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--games", type=int, default=10,
+                        help="games per ordered pair of engines")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--random-plies", type=int, default=1,
+                        help="random moves at the start of each game")
+    parser.add_argument("--time-budget-ms", type=float, default=100,
+                        help="per-move budget for alphabeta, bitboard, parallel and mcts")
+    parser.add_argument("--playouts", type=int, default=500,
+                        help="per-move playout budget for mcts")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the tracemalloc peak memory pass")
+    parser.add_argument("--output", help="write JSON lines here instead of stdout")
+    args = parser.parse_args()
+
+    shape = (args.rows, args.cols, args.k)
+    mnk.game_for(*shape)
+    if "minimax" in args.engines and args.rows * args.cols > MINIMAX_MAX_SQUARES:
+        parser.error(f"minimax only runs on boards of up to {MINIMAX_MAX_SQUARES} squares")
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for record in benchmark(
+            shape,
+            args.engines,
+            games=args.games,
+            workers=args.workers,
+            seed=args.seed,
+            random_plies=args.random_plies,
+            time_budget=args.time_budget_ms / 1000,
+            playouts=args.playouts,
+            memory=not args.no_memory,
+        ):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
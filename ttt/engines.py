@@ -0,0 +1,32 @@
+"""
+The search backends that need more than the game itself: the
+root-split process pool and MCTS. Importing this module registers them
+with ttt_logic, next to the default "alphabeta".
+"""
+
+from .mcts import mcts
+from .mnk import DEFAULT_TIME_BUDGET
+from .parallel import parallel_search
+from .ttt_logic import backends, register_backend
+
+
+def parallel_backend(game, state, time_budget=DEFAULT_TIME_BUDGET, playouts=None):
+    return parallel_search.best_move(game, state, time_budget)
+
+
+def mcts_backend(game, state, time_budget=DEFAULT_TIME_BUDGET, playouts=None):
+    return mcts.best_move(game, state, time_budget, playouts)
+
+
+register_backend("parallel", parallel_backend)
+register_backend("mcts", mcts_backend)
+
+ENGINES = tuple(backends)
+
+
+def ai_move(engine, game, state, time_budget=DEFAULT_TIME_BUDGET, playouts=None):
+    """
+    Returns the square the named engine picks for the side to move, or
+    None if the game is over. playouts only applies to MCTS.
+    """
+    return backends[engine](game, state, time_budget, playouts)
@@ -0,0 +1,232 @@
+"""
+Monte Carlo tree search (UCT) for /ttt/move.
+
+Unlike alpha-beta, MCTS needs no evaluation function and can stop
+after any number of playouts, so it answers within a fixed budget on
+any board size. It runs on the same game objects as the alpha-beta
+engines (ttt_logic.TicTacToeGame and mnk.MNKGame).
+
+After each move the subtrees under the opponent's possible replies are
+kept in a small LRU cache, so the next /ttt/move call for the same game
+continues from the playouts already spent on its position.
+"""
+
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from .mnk import DEFAULT_TIME_BUDGET
+
+X = "X"
+O = "O"
+
+# The most playouts a client may ask for on one move.
+MAX_PLAYOUTS = 200_000
+
+# Trees kept for reuse between calls.
+TREE_CACHE_SIZE = 256
+
+# Playouts run between clock checks.
+CLOCK_CHECK_PLAYOUTS = 32
+
+
+class Node():
+    """
+    One position in the search tree. wins and visits are counted for
+    the player who moved into the position, so a parent picks the
+    child with the best record for itself.
+    """
+
+    __slots__ = ("state", "move", "mover", "parent", "children", "untried",
+                 "outcome", "wins", "visits")
+
+    def __init__(self, game, state, move=None, mover=None, parent=None):
+        self.state = state
+        self.move = move
+        self.mover = mover
+        self.parent = parent
+        self.children = {}
+        self.outcome = game.outcome(state)
+        if self.outcome is None:
+            # pop() takes from the end, so the best-ordered move is
+            # expanded first.
+            self.untried = sorted(game.moves(state), key=game.move_priority, reverse=True)
+        else:
+            self.untried = []
+        self.wins = 0.0
+        self.visits = 0
+
+    def uct_child(self, exploration):
+        log_visits = math.log(self.visits)
+        return max(
+            self.children.values(),
+            key=lambda child: (
+                child.wins / child.visits
+                + exploration * math.sqrt(log_visits / child.visits)
+            ),
+        )
+
+
+def reward(outcome, mover):
+    """
+    Returns 1 for a win, 0.5 for a draw and 0 for a loss, for mover.
+    """
+    if outcome == 0:
+        return 0.5
+    return 1.0 if (outcome > 0) == (mover == X) else 0.0
+
+
+def position_key(game, state):
+    return (game.rows, game.cols, game.k, state[0], state[1])
+
+
+class MCTS():
+    """
+    UCT search with uniformly random playouts.
+    """
+
+    def __init__(self, exploration=math.sqrt(2), max_trees=TREE_CACHE_SIZE, seed=None):
+        self.exploration = exploration
+        self.max_trees = max_trees
+        self.trees = OrderedDict()
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.playouts = 0
+
+    # -- tree reuse ----------------------------------------------------
+
+    def take_tree(self, game, state):
+        """
+        Removes and returns the cached tree for state, or a new root.
+        A tree is handed to one search at a time.
+        """
+        with self.lock:
+            root = self.trees.pop(position_key(game, state), None)
+        if root is None:
+            return self.new_root(game, state)
+        return root
+
+    def new_root(self, game, state):
+        return Node(game, state, mover=O if game.player(state) == X else X)
+
+    def keep_replies(self, game, node):
+        """
+        Caches the subtree under every reply to node, the position
+        the search just chose, for the next call.
+        """
+        with self.lock:
+            for child in node.children.values():
+                child.parent = None
+                self.trees[position_key(game, child.state)] = child
+                self.trees.move_to_end(position_key(game, child.state))
+            while len(self.trees) > self.max_trees:
+                self.trees.popitem(last=False)
+
+    # -- search --------------------------------------------------------
+
+    def playout(self, game, state):
+        """
+        Plays uniformly random moves from state to the end of the game
+        and returns the outcome. The free squares are shuffled once and
+        played in order, which is the same as picking each move at
+        random.
+        """
+        outcome = game.outcome(state)
+        if outcome is not None:
+            return outcome
+
+        occupied = state[0] | state[1]
+        free = [square for square in range(game.rows * game.cols) if not occupied >> square & 1]
+        self.random.shuffle(free)
+        current = game.player(state)
+        for square in free:
+            state = game.play(state, square, current)
+            outcome = game.outcome(state)
+            if outcome is not None:
+                return outcome
+            current = O if current == X else X
+        return 0
+
+    def iterate(self, game, root):
+        """
+        Runs one selection, expansion, playout and backup pass.
+        """
+        node = root
+        while not node.untried and node.children:
+            node = node.uct_child(self.exploration)
+
+        if node.untried:
+            move = node.untried.pop()
+            mover = game.player(node.state)
+            child = Node(game, game.play(node.state, move, mover), move, mover, node)
+            node.children[move] = child
+            node = child
+
+        outcome = self.playout(game, node.state)
+        self.playouts += 1
+        while node is not None:
+            node.visits += 1
+            node.wins += reward(outcome, node.mover)
+            node = node.parent
+
+    def search(self, game, root, time_budget=DEFAULT_TIME_BUDGET, playouts=None):
+        """
+        Grows the tree at root until playouts playouts have run or
+        time_budget seconds have passed, whichever comes first. At
+        least one playout always runs.
+        """
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+        count = 0
+        while True:
+            self.iterate(game, root)
+            count += 1
+            if playouts is not None and count >= playouts:
+                break
+            if (
+                deadline is not None
+                and count % CLOCK_CHECK_PLAYOUTS == 0
+                and time.monotonic() >= deadline
+            ):
+                break
+            if root.outcome is not None:
+                break
+
+    def choose(self, game, root):
+        """
+        Returns the child to play from a searched root: an immediate
+        win if there is one, else the most visited child.
+        """
+        for move in game.moves(root.state):
+            child = root.children.get(move)
+            if child is None:
+                child = Node(game, game.play(root.state, move), move, game.player(root.state), root)
+            if child.outcome is not None and reward(child.outcome, child.mover) == 1.0:
+                return child
+        return max(root.children.values(), key=lambda child: child.visits)
+
+    def best_move(self, game, state, time_budget=DEFAULT_TIME_BUDGET, playouts=None):
+        """
+        Returns the square MCTS picks for the side to move, or None if
+        the game is over.
+        """
+        if game.outcome(state) is not None:
+            return None
+        root = self.take_tree(game, state)
+        child = self.best_child(game, root, time_budget, playouts)
+        self.keep_replies(game, child)
+        return child.move
+
+    def best_child(self, game, root, time_budget=DEFAULT_TIME_BUDGET, playouts=None):
+        """
+        Searches root and returns the chosen child, detached from root
+        so that it can serve as the root of the next search.
+        """
+        self.search(game, root, time_budget, playouts)
+        child = self.choose(game, root)
+        child.parent = None
+        return child
+
+
+mcts = MCTS()
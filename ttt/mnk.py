@@ -0,0 +1,443 @@
+"""
+m,n,k-games: tic-tac-toe on a rows x cols board where k in a row
+wins. 3x3 with k = 3 is ordinary tic-tac-toe, 15x15 with k = 5 is
+Gomoku.
+
+Exhaustive search stops being practical beyond 3x3, so the engine here
+runs iterative deepening alpha-beta (ttt.alphabeta) under a time
+budget, scores the horizon with a line-counting heuristic, and keys its
+transposition table with Zobrist hashes.
+
+Boards use the same list-of-lists format as ttt_logic, with any number
+of rows and columns.
+"""
+
+import functools
+import random
+
+from . import ttt_logic
+from .alphabeta import AlphaBeta
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Seconds the engine may spend on one move unless the caller says
+# otherwise.
+DEFAULT_TIME_BUDGET = 1.0
+
+# The most time a client may ask the engine to spend on one move.
+MAX_TIME_BUDGET = 5.0
+
+# Largest board the engine accepts, in squares.
+MAX_SQUARES = 400
+
+# Transposition tables are cleared once they grow past this many
+# entries.
+MAX_TABLE_ENTRIES = 1_000_000
+
+# State tokens below this are sent as JSON integers, which JavaScript
+# clients can read exactly; larger ones are sent as hex strings.
+MAX_INTEGER_TOKEN = 1 << 53
+
+# Candidate moves are limited to empty squares within this many rows
+# and columns of a piece already on the board.
+MOVE_REACH = 2
+
+
+class MNKGame():
+    """
+    The rules of one m,n,k-game, in the form AlphaBeta searches.
+
+    A state is a tuple (x, o, last, hash): one bitmask per player
+    (square (i, j) is bit i * cols + j), the square played last (None
+    when unknown) and the Zobrist hash of the pieces. Only lines
+    through the last move are checked for a win, so a state whose last
+    move is unknown gets a full check.
+    """
+
+    tt_move_hints = True
+
+    def __init__(self, rows, cols, k, seed=0):
+        if rows < 1 or cols < 1:
+            raise ValueError("Board must have at least one row and column.")
+        if rows * cols > MAX_SQUARES:
+            raise ValueError(f"Board is larger than {MAX_SQUARES} squares.")
+        if not 1 <= k <= max(rows, cols):
+            raise ValueError("k must be between 1 and the longer board side.")
+
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.size = rows * cols
+        self.full = (1 << self.size) - 1
+
+        # Every run of k squares in a row, column or diagonal.
+        self.lines = []
+        for i in range(rows):
+            for j in range(cols):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < cols:
+                        mask = 0
+                        for step in range(k):
+                            mask |= 1 << ((i + di * step) * cols + j + dj * step)
+                        self.lines.append(mask)
+
+        self.square_lines = [
+            tuple(line for line in self.lines if line >> square & 1)
+            for square in range(self.size)
+        ]
+
+        self.nearby = []
+        for square in range(self.size):
+            i, j = divmod(square, cols)
+            mask = 0
+            for ni in range(max(0, i - MOVE_REACH), min(rows, i + MOVE_REACH + 1)):
+                for nj in range(max(0, j - MOVE_REACH), min(cols, j + MOVE_REACH + 1)):
+                    mask |= 1 << (ni * cols + nj)
+            self.nearby.append(mask)
+
+        # Centre first, then outwards.
+        centre_i = (rows - 1) / 2
+        centre_j = (cols - 1) / 2
+        self.priority = [
+            max(abs(i - centre_i), abs(j - centre_j)) * 2
+            + (abs(i - centre_i) != abs(j - centre_j))
+            for i, j in (divmod(square, cols) for square in range(self.size))
+        ]
+
+        # Heuristic weight of a line holding n pieces of one player
+        # and none of the other. win_score sits above the largest
+        # possible heuristic total.
+        self.line_weights = [0] + [10 ** n for n in range(k - 1)]
+        self.win_score = (len(self.lines) + 1) * 10 ** k
+
+        rng = random.Random(seed)
+        self.zobrist = (
+            [rng.getrandbits(64) for _ in range(self.size)],
+            [rng.getrandbits(64) for _ in range(self.size)],
+        )
+        self.zobrist_x_to_move = rng.getrandbits(64)
+
+    # -- state ---------------------------------------------------------
+
+    def encode(self, board):
+        """
+        Returns the state for a list-of-lists board.
+        """
+        if len(board) != self.rows or any(len(row) != self.cols for row in board):
+            raise ValueError(f"Board must be {self.rows}x{self.cols}.")
+        x = o = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == X:
+                    x |= 1 << (i * self.cols + j)
+                elif cell == O:
+                    o |= 1 << (i * self.cols + j)
+                elif cell is not EMPTY:
+                    raise ValueError(f"Invalid cell {cell!r}.")
+        return (x, o, None, self.hash(x, o))
+
+    def decode(self, state):
+        """
+        Returns the list-of-lists board for a state.
+        """
+        x, o = state[0], state[1]
+        return [
+            [
+                X if x >> (i * self.cols + j) & 1
+                else O if o >> (i * self.cols + j) & 1
+                else EMPTY
+                for j in range(self.cols)
+            ]
+            for i in range(self.rows)
+        ]
+
+    def token(self, state):
+        """
+        Returns the compact state token x | o << (rows * cols), as an
+        integer when it is below MAX_INTEGER_TOKEN and as a hex string
+        otherwise.
+        """
+        token = state[0] | state[1] << self.size
+        if token < MAX_INTEGER_TOKEN:
+            return token
+        return format(token, "x")
+
+    def from_token(self, token):
+        """
+        Returns the state for a token from token(). Hex strings are
+        accepted for any board size.
+        """
+        if isinstance(token, str):
+            try:
+                token = int(token, 16)
+            except ValueError:
+                raise ValueError("State token is not a hex string.") from None
+        elif isinstance(token, bool) or not isinstance(token, int):
+            raise ValueError("State token must be an integer or hex string.")
+        if not 0 <= token < 1 << (2 * self.size):
+            raise ValueError("State token does not fit the board.")
+        x, o = token & self.full, token >> self.size
+        if x & o:
+            raise ValueError("State token has a square taken by both players.")
+        return (x, o, None, self.hash(x, o))
+
+    def hash(self, x, o):
+        value = 0
+        for square in range(self.size):
+            if x >> square & 1:
+                value ^= self.zobrist[0][square]
+            elif o >> square & 1:
+                value ^= self.zobrist[1][square]
+        return value
+
+    @staticmethod
+    def player_of(x, o):
+        x_played = bin(x).count("1")
+        o_played = bin(o).count("1")
+        if x_played == o_played:
+            return X
+        if x_played == o_played + 1:
+            return O
+        raise ValueError("Pieces on the board are out of turn.")
+
+    def wins(self, mask, square=None):
+        lines = self.lines if square is None else self.square_lines[square]
+        return any(mask & line == line for line in lines)
+
+    def winner_of(self, state):
+        x, o, last, _ = state
+        if last is not None:
+            if x >> last & 1 and self.wins(x, last):
+                return X
+            if o >> last & 1 and self.wins(o, last):
+                return O
+            return None
+        if self.wins(x):
+            return X
+        if self.wins(o):
+            return O
+        return None
+
+    # -- /ttt/move interface (shared with ttt_logic.TicTacToeGame) -----
+
+    def place(self, state, square, current_player):
+        x, o = state[0], state[1]
+        if (x | o) >> square & 1:
+            raise ValueError(f"Square {divmod(square, self.cols)} is already taken.")
+        # Forget the last move so winner() checks every line; the
+        # board may have arrived with a win already on it.
+        x, o, _, value = self.play(state, square, current_player)
+        return (x, o, None, value)
+
+    def winner(self, state):
+        return self.winner_of(state)
+
+    def terminal(self, state):
+        return self.outcome(state) is not None
+
+    def player(self, state):
+        return self.player_of(state[0], state[1])
+
+    def best_move(self, state, time_budget=DEFAULT_TIME_BUDGET, table=None):
+        """
+        Returns the best square found within time_budget seconds, or
+        None if the game is over. table defaults to the transposition
+        table shared by every game of this shape.
+        """
+        if table is None:
+            table = get_table(self.rows, self.cols, self.k)
+        if len(table) > MAX_TABLE_ENTRIES:
+            table.clear()
+        if self.outcome(state) is not None:
+            return None
+        empty = self.size - bin(state[0] | state[1]).count("1")
+        # A fresh engine per search keeps concurrent requests from
+        # sharing killer moves and deadlines.
+        engine = AlphaBeta(self, table)
+        _, square, _ = engine.iterative_deepening(state, empty, time_budget)
+        return square
+
+    # -- AlphaBeta interface -------------------------------------------
+
+    def to_move(self, state):
+        return 1 if self.player_of(state[0], state[1]) == X else -1
+
+    def moves(self, state):
+        x, o = state[0], state[1]
+        occupied = x | o
+        free = ~occupied & self.full
+        if occupied:
+            near = 0
+            pieces = occupied
+            while pieces:
+                bit = pieces & -pieces
+                pieces ^= bit
+                near |= self.nearby[bit.bit_length() - 1]
+            # On a crowded board every square near a piece may be
+            # taken; then any free square will do.
+            if free & near:
+                free &= near
+
+        moves = []
+        while free:
+            bit = free & -free
+            free ^= bit
+            moves.append(bit.bit_length() - 1)
+        return moves
+
+    def play(self, state, move, current_player=None):
+        x, o, _, value = state
+        if current_player is None:
+            current_player = self.player_of(x, o)
+        if current_player == X:
+            return (x | 1 << move, o, move, value ^ self.zobrist[0][move])
+        return (x, o | 1 << move, move, value ^ self.zobrist[1][move])
+
+    def outcome(self, state):
+        winner = self.winner_of(state)
+        if winner is not None:
+            # Sooner wins score higher.
+            empty = self.size - bin(state[0] | state[1]).count("1")
+            score = self.win_score + empty
+            return score if winner == X else -score
+        if (state[0] | state[1]) == self.full:
+            return 0
+        return None
+
+    def evaluate(self, state):
+        x, o = state[0], state[1]
+        weights = self.line_weights
+        score = 0
+        for line in self.lines:
+            x_line = x & line
+            o_line = o & line
+            if not o_line:
+                score += weights[bin(x_line).count("1")]
+            elif not x_line:
+                score -= weights[bin(o_line).count("1")]
+        return score
+
+    def key(self, state):
+        x, o, _, value = state
+        if self.player_of(x, o) == X:
+            value ^= self.zobrist_x_to_move
+        return value
+
+    def move_priority(self, move):
+        return self.priority[move]
+
+
+@functools.lru_cache(maxsize=16)
+def get_game(rows, cols, k):
+    """
+    Returns the shared MNKGame for a board shape.
+    """
+    return MNKGame(rows, cols, k)
+
+
+def game_for(rows, cols, k):
+    """
+    Returns the rules object for a board shape. Classic 3x3
+    tic-tac-toe gets ttt_logic's exact engine and opening book.
+    """
+    if (rows, cols, k) == (3, 3, 3):
+        return ttt_logic.game
+    return get_game(rows, cols, k)
+
+
+@functools.lru_cache(maxsize=16)
+def get_table(rows, cols, k):
+    """
+    Returns the transposition table shared by every search on a board
+    shape, so work carries over between moves and requests.
+    """
+    return {}
+
+
+def default_k(rows, cols):
+    """
+    The win length used when a request gives only board dimensions:
+    the shorter side, capped at Gomoku's five.
+    """
+    return min(rows, cols, 5)
+
+
+# ---------------------------------------------------------------------------
+# List-of-lists API
+# ---------------------------------------------------------------------------
+
+def initial_state(rows=3, cols=3):
+    """
+    Returns an empty rows x cols board.
+    """
+    return [[EMPTY] * cols for _ in range(rows)]
+
+
+def shape(board):
+    """
+    Returns (rows, cols) for a board.
+    """
+    if not board or not board[0]:
+        raise ValueError("Board must have at least one row and column.")
+    return len(board), len(board[0])
+
+
+def player(board, k):
+    """
+    Returns player who has the next turn on a board.
+    """
+    game = get_game(*shape(board), k)
+    x, o, _, _ = game.encode(board)
+    return game.player_of(x, o)
+
+
+def result(board, action, forced_player=None):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    i, j = action
+    rows, cols = shape(board)
+    if not (0 <= i < rows and 0 <= j < cols):
+        raise ValueError(f"Move {action} is off the board.")
+    if board[i][j] is not EMPTY:
+        raise ValueError(f"Square {action} is already taken.")
+    temp_board = [list(row) for row in board]
+    if forced_player is None:
+        x_played = sum(row.count(X) for row in board)
+        o_played = sum(row.count(O) for row in board)
+        forced_player = X if x_played == o_played else O
+    temp_board[i][j] = forced_player
+    return temp_board
+
+
+def winner(board, k):
+    """
+    Returns the winner of the game if there is one.
+    """
+    game = get_game(*shape(board), k)
+    return game.winner_of(game.encode(board))
+
+
+def terminal(board, k):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    game = get_game(*shape(board), k)
+    return game.outcome(game.encode(board)) is not None
+
+
+def minimax(board, k, time_budget=DEFAULT_TIME_BUDGET):
+    """
+    Returns the best move (i, j) the engine finds for the current
+    player within time_budget seconds, or None if the game is over.
+    """
+    rows, cols = shape(board)
+    game = get_game(rows, cols, k)
+    square = game.best_move(game.encode(board), time_budget)
+    if square is None:
+        return None
+    return divmod(square, cols)
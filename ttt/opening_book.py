@@ -0,0 +1,70 @@
+"""
+Builds ttt/opening_book.json, the table of optimal moves for every
+position reachable from the empty board with X moving first.
+
+    python -m ttt.opening_book
+
+Keys are x | o << 9 bitboard codes and values are square indices
+(i * 3 + j). Moves come from ttt_logic.bb_minimax, so the book gives
+exactly the moves a full search would.
+"""
+
+import json
+
+from .ttt_logic import (
+    BOOK_PATH,
+    FULL,
+    bb_minimax,
+    bb_player,
+    bb_terminal,
+    X,
+)
+
+
+def reachable_positions():
+    """
+    Returns every non-terminal position reachable from the empty board,
+    as (x, o) pairs.
+    """
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in seen or bb_terminal(x, o):
+            continue
+        seen.add((x, o))
+        x_to_move = bb_player(x, o) == X
+        free = ~(x | o) & FULL
+        for square in range(9):
+            if free >> square & 1:
+                if x_to_move:
+                    stack.append((x | 1 << square, o))
+                else:
+                    stack.append((x, o | 1 << square))
+    return seen
+
+
+def build_book():
+    return {
+        x | o << 9: bb_minimax(x, o)
+        for x, o in reachable_positions()
+    }
+
+
+def main():
+    book = build_book()
+    with open(BOOK_PATH, "w") as f:
+        json.dump(
+            {
+                "format": "x | o << 9 bitboard code -> square i * 3 + j",
+                "moves": {str(code): book[code] for code in sorted(book)},
+            },
+            f,
+            separators=(",", ":"),
+        )
+        f.write("\n")
+    print(f"Wrote {len(book)} positions to {BOOK_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Parallel alpha-beta for /ttt/move.
+
+Root moves are split across a process pool in the young brothers wait
+style: the best-ordered root move is searched first, on its own, to get
+a bound, then its siblings are searched in parallel against that bound.
+All processes read and write one transposition table in shared memory,
+so work done under one root move is reused by the others and by later
+iterations and moves.
+"""
+
+import ctypes
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from .alphabeta import INFINITY, AlphaBeta, SearchTimeout
+from .mnk import DEFAULT_TIME_BUDGET, game_for
+
+# Extra time the web process waits for workers to notice their
+# deadline before giving up on them.
+TIMEOUT_GRACE_SECONDS = 1
+
+MASK64 = (1 << 64) - 1
+SIGN64 = 1 << 63
+
+
+class SearchUnavailable(Exception):
+    """Raised when the worker pool has died."""
+
+
+def to_signed(value):
+    value &= MASK64
+    return value - (1 << 64) if value & SIGN64 else value
+
+
+class SharedTable():
+    """
+    A fixed-size transposition table in shared memory, usable anywhere
+    AlphaBeta takes a dict.
+
+    Each key has one slot (key % size) of three 64-bit words: a check
+    word, the value, and the depth, flag and move packed together. A
+    newer entry overwrites an older one. Writes take no lock; the
+    check word is key ^ value ^ meta, so a reader discards an entry
+    for another key or one torn by a concurrent write. Values must fit
+    in 64 bits; larger ones are not stored.
+    """
+
+    def __init__(self, size, words=None):
+        self.size = size
+        if words is None:
+            words = multiprocessing.RawArray("q", 3 * size)
+        self.words = words
+
+    def slot(self, key):
+        return 3 * (key % self.size)
+
+    def get(self, key, default=None):
+        slot = self.slot(key)
+        check, value, meta = self.words[slot:slot + 3]
+        if not meta or (check ^ value ^ meta) & MASK64 != key & MASK64:
+            return default
+        depth = meta & 0xFFFF
+        flag = meta >> 16 & 0xFF
+        move = (meta >> 24) - 1
+        return depth, value, flag, None if move < 0 else move
+
+    def __setitem__(self, key, entry):
+        depth, value, flag, move = entry
+        if not -SIGN64 <= value < SIGN64:
+            return
+        meta = depth | flag << 16 | (0 if move is None else move + 1) << 24
+        slot = self.slot(key)
+        self.words[slot:slot + 3] = [to_signed(key ^ value ^ meta), value, meta]
+
+    def clear(self):
+        ctypes.memset(self.words, 0, ctypes.sizeof(self.words))
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+worker_table = None
+
+
+def init_worker(words, size):
+    global worker_table
+
+    worker_table = SharedTable(size, words)
+
+
+def search_move(rows, cols, k, state, move, depth, alpha, deadline):
+    """
+    Searches root move with the window (alpha, infinity) and returns
+    (value, nodes), value being for the side to move at the root. The
+    value is None if deadline (a time.monotonic() value) passed first.
+    """
+    game = game_for(rows, cols, k)
+    # A fresh engine per job; only the table is shared.
+    engine = AlphaBeta(game, worker_table)
+    engine.deadline = deadline
+    try:
+        value = -engine.search(game.play(state, move), depth - 1, -INFINITY, -alpha, 1)
+    except SearchTimeout:
+        value = None
+    return value, engine.nodes
+
+
+# ---------------------------------------------------------------------------
+# Web process side
+# ---------------------------------------------------------------------------
+
+class ParallelSearch():
+    """
+    Iterative deepening alpha-beta with each depth's root split across
+    a ProcessPoolExecutor.
+
+    The web process searches the first root move itself, then hands
+    the remaining ones to the pool with a window that lets ties come
+    back exact, so the natural-order tie-break of AlphaBeta.best_move
+    still applies.
+
+    Every search, in the web process or a worker, gets its own
+    AlphaBeta over the shared table, so concurrent requests cannot
+    disturb each other's killer moves or deadlines. nodes counts the
+    nodes searched by all requests.
+    """
+
+    def __init__(self, workers=None, table_entries=1 << 20):
+        self.workers = workers or os.cpu_count() or 1
+        self.table = SharedTable(table_entries)
+        self.lock = threading.Lock()
+        self.executor = None
+        self.nodes = 0
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=init_worker,
+                    initargs=(self.table.words, self.table.size),
+                )
+            return self.executor
+
+    def reset_executor(self, executor):
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """
+        Stops the worker pool; the next search starts a new one. A
+        process that is itself a pool worker must call this before it
+        exits, or it waits forever for the idle workers.
+        """
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def count_nodes(self, nodes):
+        with self.lock:
+            self.nodes += nodes
+
+    def search_depth(self, game, state, depth, deadline):
+        """
+        Returns (value, move) for a depth-limited search of state, or
+        raises SearchTimeout if deadline passes first.
+        """
+        engine = AlphaBeta(game, self.table)
+        natural = {move: position for position, move in enumerate(game.moves(state))}
+        entry = self.table.get(game.key(state))
+        ordered = engine.ordered_moves(state, 0, entry[3] if entry else None)
+
+        # Eldest brother, searched here with a full window.
+        engine.deadline = deadline
+        try:
+            best_value = -engine.search(
+                game.play(state, ordered[0]), depth - 1, -INFINITY, INFINITY, 1,
+            )
+        finally:
+            self.count_nodes(engine.nodes)
+        best = ordered[0]
+
+        # Younger brothers, in parallel. Against best_value - 1 a tie
+        # comes back exact. Once a win is found only moves earlier in
+        # natural order could still take its place.
+        young = [
+            move for move in ordered[1:]
+            if best_value < game.win_score or natural[move] < natural[best]
+        ]
+        if not young:
+            return best_value, best
+
+        executor = self.get_executor()
+        try:
+            futures = [
+                (move, executor.submit(
+                    search_move, game.rows, game.cols, game.k,
+                    state, move, depth, best_value - 1, deadline,
+                ))
+                for move in young
+            ]
+        except (BrokenProcessPool, RuntimeError) as exc:
+            self.reset_executor(executor)
+            raise SearchUnavailable(str(exc)) from exc
+
+        try:
+            for move, future in futures:
+                timeout = None
+                if deadline is not None:
+                    timeout = max(deadline - time.monotonic(), 0) + TIMEOUT_GRACE_SECONDS
+                value, nodes = future.result(timeout=timeout)
+                self.count_nodes(nodes)
+                if value is None:
+                    raise SearchTimeout()
+                if (value, -natural[move]) > (best_value, -natural[best]):
+                    best_value, best = value, move
+        except TimeoutError:
+            raise SearchTimeout() from None
+        except BrokenProcessPool as exc:
+            self.reset_executor(executor)
+            raise SearchUnavailable(str(exc)) from exc
+        finally:
+            for _, future in futures:
+                future.cancel()
+
+        return best_value, best
+
+    def best_move(self, game, state, time_budget=DEFAULT_TIME_BUDGET):
+        """
+        Returns the best square found within time_budget seconds, or
+        None if the game is over.
+        """
+        if game.outcome(state) is not None:
+            return None
+
+        start = time.monotonic()
+        engine = AlphaBeta(game, self.table)
+        value, move = engine.best_move(state, 1)
+        self.count_nodes(engine.nodes)
+        max_depth = game.rows * game.cols - bin(state[0] | state[1]).count("1")
+        deadline = None if time_budget is None else start + time_budget
+
+        try:
+            for depth in range(2, max_depth + 1):
+                if abs(value) >= game.win_score:
+                    break
+                value, move = self.search_depth(game, state, depth, deadline)
+        except SearchTimeout:
+            pass
+        return move
+
+
+parallel_search = ParallelSearch(
+    workers=int(os.environ.get("TTT_SEARCH_WORKERS", "0")) or None,
+    table_entries=int(os.environ.get("TTT_SHARED_TABLE_ENTRIES", str(1 << 20))),
+)
@@ -1,8 +1,32 @@
+import os
 import pygame
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Import the engine as part of the ttt package, whichever directory
+# the runner is started from.
+sys.path.insert(0, os.path.dirname(HERE))
+
+from ttt import ttt_logic as ttt  # noqa: E402
+
+# The AI's move is shown no sooner than this, so it does not appear
+# to play instantly.
+MIN_THINK_SECONDS = 0.5
+
+
+def think(board):
+    """
+    Runs on the AI thread, so the render loop keeps drawing while the
+    engine searches.
+    """
+    began = time.monotonic()
+    move = ttt.minimax(board)
+    time.sleep(max(0, MIN_THINK_SECONDS - (time.monotonic() - began)))
+    return move
 
-import tictactoe as ttt
 
 pygame.init()
 size = width, height = 600, 400
@@ -13,13 +37,17 @@ white = (255, 255, 255)
 
 screen = pygame.display.set_mode(size)
 
-mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
-largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+font_path = os.path.join(HERE, "OpenSans-Regular.ttf")
+mediumFont = pygame.font.Font(font_path, 28)
+largeFont = pygame.font.Font(font_path, 40)
+moveFont = pygame.font.Font(font_path, 60)
+
+ai_executor = ThreadPoolExecutor(max_workers=1)
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+# The AI move being searched for, if any.
+ai_future = None
 
 while True:
 
@@ -110,13 +138,11 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_future is None:
+                ai_future = ai_executor.submit(think, board)
+            elif ai_future.done():
+                board = ttt.result(board, ai_future.result())
+                ai_future = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +167,6 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    ai_future = None
 
     pygame.display.flip()
@@ -0,0 +1,150 @@
+"""
+Server-side tic-tac-toe games for /ttt/move.
+
+A session holds the position and whatever its engine learned searching
+it: an MCTS subtree, or for alpha-beta the shared transposition table
+of its board shape. The client sends only its move, and each reply
+starts from the previous turn's search instead of from scratch.
+
+Sessions live in memory in a bounded store. They expire after a period
+without moves, and the least recently used one is dropped when the
+store is full.
+"""
+
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from .engines import ai_move
+from .mcts import mcts
+from .mnk import DEFAULT_TIME_BUDGET
+
+X = "X"
+O = "O"
+
+
+class GameSession():
+    """
+    One game between a client playing X and an engine playing O.
+    """
+
+    def __init__(self, game, engine="alphabeta", time_budget=DEFAULT_TIME_BUDGET,
+                 playouts=None):
+        self.id = secrets.token_urlsafe(16)
+        self.game = game
+        self.state = game.from_token(0)
+        self.engine = engine
+        self.time_budget = time_budget
+        self.playouts = playouts
+        # MCTS: the subtree at the current position. Alpha-beta
+        # sessions reuse the bounded transposition table shared by
+        # every game of the shape, so they keep nothing of their own.
+        self.tree = None
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    def play(self, square):
+        """
+        Plays square for X and the engine's reply for O. Returns the new
+        state. Raises ValueError for a taken square. The session only
+        changes once the reply is found, so a failed search leaves it
+        as it was.
+        """
+        game = self.game
+        state = game.place(self.state, square, X)
+
+        # Follow X's move down the tree, if MCTS ever tried it.
+        tree = None
+        if self.tree is not None:
+            tree = self.tree.children.get(square)
+
+        if not game.terminal(state):
+            reply, tree = self.reply(state, tree)
+            if reply is not None:
+                state = game.place(state, reply, O)
+
+        self.state = state
+        self.tree = tree
+        return state
+
+    def reply(self, state, tree):
+        """
+        Returns (square, tree): the engine's move from state, and for
+        MCTS the subtree under it.
+        """
+        game = self.game
+        if self.engine == "mcts":
+            if tree is None:
+                tree = mcts.new_root(game, state)
+            tree.parent = None
+            child = mcts.best_child(game, tree, self.time_budget, self.playouts)
+            return child.move, child
+        return ai_move(self.engine, game, state, self.time_budget, self.playouts), None
+
+
+class SessionStore():
+    """
+    Sessions by id, in least recently used order. A session is removed
+    ttl seconds after its last use, or when max_entries newer sessions
+    have been used since.
+    """
+
+    def __init__(self, max_entries=1024, ttl=1800):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def expire(self, now):
+        """
+        Drops expired sessions. Caller holds the lock.
+        """
+        while self.entries:
+            session = next(iter(self.entries.values()))
+            if now - session.last_used < self.ttl:
+                break
+            self.entries.popitem(last=False)
+
+    def add(self, session):
+        now = time.monotonic()
+        with self.lock:
+            self.expire(now)
+            session.last_used = now
+            self.entries[session.id] = session
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return session
+
+    def get(self, session_id):
+        """
+        Returns the session and marks it used. Raises KeyError if it
+        does not exist or has expired.
+        """
+        now = time.monotonic()
+        with self.lock:
+            self.expire(now)
+            session = self.entries[session_id]
+            session.last_used = now
+            self.entries.move_to_end(session_id)
+        return session
+
+    def discard(self, session_id):
+        with self.lock:
+            return self.entries.pop(session_id, None) is not None
+
+    def stats(self):
+        with self.lock:
+            self.expire(time.monotonic())
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+            }
+
+
+sessions = SessionStore(
+    max_entries=int(os.environ.get("TTT_SESSION_MAX", "1024")),
+    ttl=float(os.environ.get("TTT_SESSION_TTL_SECONDS", "1800")),
+)
@@ -1,10 +1,398 @@
+"""
+Tic Tac Toe engine, shared by the pygame runner and the Flask /ttt routes.
+
+The list-of-lists API at the bottom (initial_state, player, actions,
+result, winner, terminal, utility, minimax) is the stable interface.
+Underneath it positions are bitboards, and minimax hands the search to
+a pluggable backend from the registry below.
+"""
+
+import json
 import math
-import copy
+import os
+
+from .alphabeta import AlphaBeta
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# ---------------------------------------------------------------------------
+# Bitboard engine
+#
+# A position is a pair of 9-bit masks (x, o), one per player. Square
+# (i, j) is bit i * 3 + j. Every rule below is integer arithmetic on
+# those masks; the list-of-lists functions further down are adapters
+# over it.
+# ---------------------------------------------------------------------------
+
+FULL = 0x1FF
+
+LINES = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # columns
+    0b100010001, 0b001010100,               # diagonals
+)
+
+# Lines through each square, so a move only checks its own lines.
+SQUARE_LINES = tuple(
+    tuple(line for line in LINES if line >> square & 1)
+    for square in range(9)
+)
+
+
+def encode(board):
+    """
+    Returns the (x, o) bitboards of a list-of-lists board. Raises
+    ValueError, with the messages mnk.MNKGame.encode uses, for a board
+    that is not 3x3 or a cell that is not X, O or empty.
+    """
+    if len(board) != 3 or any(len(row) != 3 for row in board):
+        raise ValueError("Board must be 3x3.")
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, square in enumerate(row):
+            if square == X:
+                x |= 1 << (i * 3 + j)
+            elif square == O:
+                o |= 1 << (i * 3 + j)
+            elif square is not EMPTY:
+                raise ValueError(f"Invalid cell {square!r}.")
+    return x, o
+
+
+def decode(x, o):
+    """
+    Returns the list-of-lists board of bitboards (x, o).
+    """
+    return [
+        [
+            X if x >> (i * 3 + j) & 1 else O if o >> (i * 3 + j) & 1 else EMPTY
+            for j in range(3)
+        ]
+        for i in range(3)
+    ]
+
+
+def encode_token(x, o):
+    """
+    Returns the compact state token of bitboards (x, o): the 18-bit
+    integer x | o << 9, the same code the opening book uses.
+    """
+    return x | o << 9
+
+
+def decode_token(token):
+    """
+    Returns the (x, o) bitboards of a state token, given as an integer
+    or, as for larger boards, a hex string.
+    """
+    if isinstance(token, str):
+        try:
+            token = int(token, 16)
+        except ValueError:
+            raise ValueError("State token is not a hex string.") from None
+    elif isinstance(token, bool) or not isinstance(token, int):
+        raise ValueError("State token must be an integer or hex string.")
+    if not 0 <= token < 1 << 18:
+        raise ValueError("State token must be an 18-bit integer.")
+    x, o = token & FULL, token >> 9
+    if x & o:
+        raise ValueError("State token has a square taken by both players.")
+    return x, o
+
+
+def bb_player(x, o):
+    # The search assumes the players alternate, so boards where one
+    # side is ahead by more than the opening move are rejected, as
+    # mnk.MNKGame.player_of does.
+    x_played = bin(x).count("1")
+    o_played = bin(o).count("1")
+    if x_played == o_played:
+        return X
+    if x_played == o_played + 1:
+        return O
+    raise ValueError("Pieces on the board are out of turn.")
+
+
+def bb_actions(x, o):
+    """
+    Returns the free squares as bit indices in row-major order.
+    """
+    free = ~(x | o) & FULL
+    return [square for square in range(9) if free >> square & 1]
+
+
+def bb_result(x, o, square, current_player):
+    bit = 1 << square
+    if current_player == X:
+        return x | bit, o & ~bit
+    return x & ~bit, o | bit
+
+
+def bb_wins(mask):
+    for line in LINES:
+        if mask & line == line:
+            return True
+    return False
+
+
+def bb_winner(x, o):
+    if bb_wins(x):
+        return X
+    if bb_wins(o):
+        return O
+    return None
+
+
+def bb_terminal(x, o):
+    return (x | o) == FULL or bb_wins(x) or bb_wins(o)
+
+
+def bb_utility(x, o):
+    if bb_wins(x):
+        return 1
+    if bb_wins(o):
+        return -1
+    if (x | o) == FULL:
+        return 0
+    raise ValueError("Game is not done yet !!!")
+
+
+def transform_square(square, symmetry):
+    """
+    Maps a square through one of the 8 board symmetries: symmetry & 3
+    quarter turns, then a mirror if symmetry & 4.
+    """
+    i, j = divmod(square, 3)
+    for _ in range(symmetry & 3):
+        i, j = j, 2 - i
+    if symmetry & 4:
+        j = 2 - j
+    return i * 3 + j
+
+
+# SYMMETRY_TABLES[s][mask] is mask mapped through symmetry s.
+SYMMETRY_TABLES = tuple(
+    tuple(
+        sum(1 << transform_square(square, symmetry)
+            for square in range(9) if mask >> square & 1)
+        for mask in range(1 << 9)
+    )
+    for symmetry in range(8)
+)
+
+
+def canonical_key(x, o):
+    """
+    Returns the smallest x | o << 9 code over the 8 symmetric versions
+    of a position, so symmetric positions share one table entry.
+    """
+    return min(table[x] | table[o] << 9 for table in SYMMETRY_TABLES)
+
+
+# ---------------------------------------------------------------------------
+# Search
+#
+# bb_minimax runs ttt.alphabeta over the bitboard rules below.
+# ---------------------------------------------------------------------------
+
+class TicTacToeGame():
+    """
+    The 3x3 bitboard rules in the form AlphaBeta searches. States are
+    (x, o) pairs.
+
+    Wins score win_score rather than 1 so that the line-counting
+    heuristic used by depth-limited searches always ranks below a win.
+    """
+
+    win_score = 100
+    # Keys fold symmetric positions together, so a stored best move
+    # may belong to a different orientation.
+    tt_move_hints = False
+
+    # Centre, then corners, then edges.
+    PRIORITY = (1, 2, 1, 2, 0, 2, 1, 2, 1)
+
+    def to_move(self, state):
+        return 1 if bb_player(*state) == X else -1
+
+    def moves(self, state):
+        return bb_actions(*state)
+
+    def play(self, state, move, current_player=None):
+        x, o = state
+        if current_player is None:
+            current_player = bb_player(x, o)
+        return bb_result(x, o, move, current_player)
+
+    def outcome(self, state):
+        x, o = state
+        if bb_wins(x):
+            return self.win_score
+        if bb_wins(o):
+            return -self.win_score
+        if (x | o) == FULL:
+            return 0
+        return None
+
+    def evaluate(self, state):
+        # Lines still open for X minus lines still open for O.
+        x, o = state
+        score = 0
+        for line in LINES:
+            if not o & line:
+                score += 1
+            if not x & line:
+                score -= 1
+        return score
+
+    def key(self, state):
+        # The piece counts fix the side to move, so the canonical
+        # position is the whole key.
+        x, o = state
+        return canonical_key(x, o)
+
+    def move_priority(self, move):
+        return self.PRIORITY[move]
+
+    # The methods below give /ttt/move one interface over this class
+    # and mnk.MNKGame.
+
+    rows = cols = k = 3
+
+    def encode(self, board):
+        return encode(board)
+
+    def decode(self, state):
+        return decode(*state)
+
+    def token(self, state):
+        return encode_token(*state)
+
+    def from_token(self, token):
+        return decode_token(token)
+
+    def place(self, state, square, current_player):
+        x, o = state
+        if (x | o) >> square & 1:
+            raise ValueError(f"Square {divmod(square, self.cols)} is already taken.")
+        return bb_result(x, o, square, current_player)
+
+    def winner(self, state):
+        return bb_winner(*state)
+
+    def terminal(self, state):
+        return bb_terminal(*state)
+
+    def player(self, state):
+        return bb_player(*state)
+
+    def best_move(self, state, time_budget=None):
+        # Exact, so the time budget is not needed.
+        return bb_best_move(*state)
+
+
+# The transposition table persists across calls and is shared by
+# every search, each of which gets its own AlphaBeta. There are only
+# 765 canonical reachable positions, so it needs no eviction.
+game = TicTacToeGame()
+transposition_table = {}
+
+
+def bb_minimax(x, o, depth=9):
+    """
+    Returns the optimal square for the player to move, as a bit index.
+    Ties go to the first square in row-major order, as in exhaustive
+    minimax. A depth below the number of free squares gives a
+    heuristic depth-limited search instead.
+    """
+    if bb_terminal(x, o):
+        return None
+    _, square = AlphaBeta(game, transposition_table).best_move((x, o), depth)
+    return square
+
+
+# ---------------------------------------------------------------------------
+# Opening book
+#
+# Optimal moves for every position reachable from the empty board,
+# precomputed offline by ttt/opening_book.py and loaded at import.
+# ---------------------------------------------------------------------------
+
+BOOK_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "opening_book.json",
+)
+
+
+def load_book(path=BOOK_PATH):
+    """
+    Returns the book as {x | o << 9: square}, or an empty dict if the
+    book file is missing.
+    """
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {int(code): square for code, square in data["moves"].items()}
+
+
+opening_book = load_book()
+
+
+def bb_best_move(x, o):
+    """
+    Returns the optimal square from the opening book, searching only
+    for positions the book does not cover.
+    """
+    square = opening_book.get(x | o << 9)
+    if square is not None:
+        return square
+    return bb_minimax(x, o)
+
+
+# ---------------------------------------------------------------------------
+# Search backends
+#
+# A backend is called as backend(game, state, time_budget, playouts)
+# and returns the square to play. "alphabeta" is the game's own
+# best_move, which on 3x3 is the opening book backed by alpha-beta.
+# ttt.engines registers "parallel" and "mcts".
+# ---------------------------------------------------------------------------
+
+backends = {}
+
+
+def register_backend(name, search):
+    backends[name] = search
+
+
+def alphabeta_backend(game, state, time_budget=None, playouts=None):
+    return game.best_move(state, time_budget)
+
+
+register_backend("alphabeta", alphabeta_backend)
+
+
+def get_backend(name):
+    """
+    Returns the backend registered as name. Raises ValueError for an
+    unknown name.
+    """
+    if name not in backends:
+        # Registers the backends that need a process pool or MCTS.
+        from . import engines  # noqa: F401
+    try:
+        return backends[name]
+    except KeyError:
+        raise ValueError(f"Unknown search backend {name!r}.") from None
+
+
+# ---------------------------------------------------------------------------
+# List-of-lists API
+# ---------------------------------------------------------------------------
 
 def initial_state():
     """
@@ -19,20 +407,7 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    x_played = 0
-    o_played = 0
-    for row in board:
-        for square in row:
-            if square == X:
-                x_played += 1
-            if square == O:
-                o_played += 1
-    if x_played == o_played:
-        return X          
-    elif x_played > o_played:
-        return O
-    else:
-        raise("O played out of turn")
+    return bb_player(*encode(board))
 
 
 def actions(board):
@@ -51,7 +426,7 @@ def result(board, action, forced_player=None):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    temp_board = copy.deepcopy(board)
+    temp_board = [list(row) for row in board]
     i, j = action
     current_player = forced_player if forced_player else player(board)
     temp_board[i][j] = current_player
@@ -61,87 +436,33 @@ def winner(board):
     """
     Returns the winner of the game if there is one.
     """
-    # Rows and columns
-    for i in range(3):
-        if board[i][0] is not None and board[i][0] == board[i][1] == board[i][2]:
-            return board[i][0]
-        if board[0][i] is not None and board[0][i] == board[1][i] == board[2][i]:
-            return board[0][i]
-    # Diagonals
-    if board[0][0] is not None and board[0][0] == board[1][1] == board[2][2]:
-        return board[0][0]
-    if board[0][2] is not None and board[0][2] == board[1][1] == board[2][0]:
-        return board[0][2]
-    return None
+    return bb_winner(*encode(board))
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    w = winner(board)
-    if w in (X,O):
-        return True
-    else:
-        for row in board:
-            for square in row:
-                if square is None:
-                    return False
-    return True
+    return bb_terminal(*encode(board))
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if terminal(board):
-        w = winner(board)
-        if w == X:
-            return 1
-        elif w == O:
-            return -1
-        else:
-            return 0
-    else:
-        raise("Game is not done yet !!!")
+    return bb_utility(*encode(board))
 
-def minimax(board):
+def minimax(board, backend="alphabeta", time_budget=None, playouts=None):
     """
     Returns the optimal action for the current player on the board.
+    backend names the search to use; the default is exact.
     """
-    if terminal(board):
+    search = get_backend(backend)
+    state = encode(board)
+    if bb_terminal(*state):
         return None
-
-    current_player = player(board)
-
-    def max_value(state):
-        if terminal(state):
-            return utility(state), None  # ✅ Return tuple
-        v = float('-inf')
-        best_move = None
-        for action in actions(state):
-            min_result, _ = min_value(result(state, action))
-            if min_result > v:
-                v = min_result
-                best_move = action
-        return v, best_move
-
-    def min_value(state):
-        if terminal(state):
-            return utility(state), None  # ✅ Return tuple
-        v = float('inf')
-        best_move = None
-        for action in actions(state):
-            max_result, _ = max_value(result(state, action))
-            if max_result < v:
-                v = max_result
-                best_move = action
-        return v, best_move
-
-    if current_player == X:
-        _, move = max_value(board)
-    else:
-        _, move = min_value(board)
-
-    return move
+    square = search(game, state, time_budget, playouts)
+    if square is None:
+        return None
+    return divmod(square, 3)
 # board = [
 #     ['O', 'O', 'X'],
 #     ['O', 'X', 'X'],